@@ -9,7 +9,9 @@
 import sys
 from tkinter import *
 import tkinter.messagebox
+import time
 import random
+from collections import deque, namedtuple
 
 MIN_ROW_COUNT = 5
 MAX_ROW_COUNT = 30
@@ -17,240 +19,688 @@ MAX_ROW_COUNT = 30
 MIN_COLUMN_COUNT = 5
 MAX_COLUMN_COUNT = 30
 
+# Пределы размеров поля для модели на плоских массивах.
+MAX_ARRAY_ROW_COUNT = 10000
+MAX_ARRAY_COLUMN_COUNT = 10000
+
+# Наибольшее время (в секундах), которое контроллер тратит на разбор
+# очереди щелчков, прежде чем вернуть управление циклу событий Tk.
+EVENT_TIME_BUDGET = 0.02
+# Период опроса запаса полей без угадывания, пока поле готовится, мс.
+NOGUESS_POLL_INTERVAL = 200
+
+# Размер ячейки в пикселях для MinesweeperCanvasView.
+CELL_SIZE = 20
+
+# Коды состояний игровой клетки и их строковые имена.
+STATE_CLOSED = 0
+STATE_OPENED = 1
+STATE_FLAGGED = 2
+STATE_QUESTIONED = 3
+STATE_NAMES = ('closed', 'opened', 'flagged', 'questioned')
+# Переходы меток по правому клику: closed -> flagged -> questioned -> closed.
+NEXT_MARK = (STATE_FLAGGED, STATE_OPENED, STATE_QUESTIONED, STATE_CLOSED)
+
 #MIN_MINE_COUNT = 1
 #MAX_MINE_COUNT = 800
 
+def sampleMines(rng, cellCount, mineCount, excluded):
+    """
+    Выбирает mineCount различных линейных индексов из range(cellCount),
+    не входящих в множество excluded.
+    Выборка делается одним вызовом rng.sample без повторных попыток,
+    поэтому время генерации не зависит от плотности мин.
+    """
+    candidates = rng.sample(range(cellCount), mineCount + len(excluded))
+    return [index for index in candidates if index not in excluded][:mineCount]
+
+def makeRandom(seed):
+    """
+    Возвращает пару (seed, random.Random) для генерации поля.
+    seed может быть числом, экземпляром random.Random или None -
+    в последнем случае зерно выбирается случайно и сохраняется,
+    чтобы поле можно было воспроизвести.
+    """
+    if isinstance(seed, random.Random):
+        return None, seed
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    return seed, random.Random(seed)
+
+# Показатели сложности поля: bv3 - 3BV, наименьшее число щелчков левой
+# кнопкой, открывающих поле; openings - число пустых областей;
+# isolated - число ячеек с цифрой, не граничащих с пустыми;
+# openingCells - число ячеек, открываемых пустыми областями.
+BoardMetrics = namedtuple('BoardMetrics', 'bv3 openings isolated openingCells')
+ZERO_TABLE = bytes([1] + [0] * 255)
+
+def countBoardMetrics(rowCount, columnCount, mines, counters):
+    """
+    Вычисляет BoardMetrics по плоским последовательностям mines и counters
+    (по элементу на ячейку, построчно).
+    Пустые ячейки (без мин вокруг) объединяются в области системой
+    непересекающихся множеств, поэтому поле обходится за один проход.
+    3BV = число пустых областей + число изолированных цифр.
+    """
+    cellCount = rowCount * columnCount
+    mines = bytes(mines)
+    # Байт равен 1 у пустых ячеек: объединение масок мин и счетчиков
+    # делается сразу по всему полю, как в countAllMines.
+    occupied = int.from_bytes(mines, 'little') | int.from_bytes(bytes(counters), 'little')
+    zero = bytearray(occupied.to_bytes(cellCount, 'little').translate(ZERO_TABLE))
+    parent = list(range(cellCount))
+    # Ячейки, которые откроются вместе с какой-либо пустой областью.
+    covered = bytearray(cellCount)
+
+    def union(first, second):
+        first, second = find(first), find(second)
+        if first != second:
+            parent[second] = first
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    lastRow = rowCount - 1
+    lastColumn = columnCount - 1
+    zeroes = []
+    index = zero.find(1)
+    while index != -1:
+        zeroes.append(index)
+        index = zero.find(1, index + 1)
+    for index in zeroes:
+        row, column = divmod(index, columnCount)
+        first = index - 1 if column > 0 else index
+        last = index + 2 if column < lastColumn else index + 1
+        for start in (first - columnCount, first, first + columnCount):
+            if 0 <= start < cellCount:
+                covered[start:start + last - first] = b'\x01' * (last - first)
+        # Области связны по всем восьми направлениям; достаточно
+        # соединить ячейку с правой соседкой и тремя нижними.
+        if column < lastColumn and zero[index + 1]:
+            union(index, index + 1)
+        if row < lastRow:
+            for n in range(first + columnCount, last + columnCount):
+                if zero[n]:
+                    union(index, n)
+
+    openings = sum(1 for index in zeroes if parent[index] == index)
+    openingCells = covered.count(1)
+    isolated = cellCount - mines.count(1) - openingCells
+    return BoardMetrics(openings + isolated, openings, isolated, openingCells)
+
 class MinesweeperCell:
     """
     Класс ячейки минного поля.
     Используется в модели MVC.
+    Состояние хранится целочисленным кодом (STATE_CLOSED и т.д.)
+    в stateCode, а свойство state возвращает его строковое имя.
     """
     # Состояния игровой клетки:
     #   closed - закрыта
     #   opened - открыта
     #   flagged - помечена флажком
     #   questioned - помечена вопросительным знаком
+    __slots__ = ('row', 'column', 'stateCode', 'mined', 'counter')
 
     def __init__(self, row, column):
         self.row = row
         self.column = column
-        self.state = 'closed'
+        self.stateCode = STATE_CLOSED
         self.mined = False
         self.counter = 0
-        self.markSequence = ['closed', 'flagged', 'questioned']
+
+    @property
+    def state(self):
+        return STATE_NAMES[self.stateCode]
+
+    @state.setter
+    def state(self, name):
+        self.stateCode = STATE_NAMES.index(name)
 
     def nextMark(self):
         """
-        Метод циклически изменяет состояние игровой клетки.
+        Метод циклически изменяет состояние игровой клетки
+        по общей таблице переходов NEXT_MARK.
         """
-        if self.state in self.markSequence:
-            stateIndex = self.markSequence.index(self.state)
-            self.state = self.markSequence[(stateIndex + 1) % len(self.markSequence)]
+        self.stateCode = NEXT_MARK[self.stateCode]
 
     def open(self):
         """
         Метод позволяет открыть ячейку, если она не помечена флажком
         (состояние 'flagged').
         """
-        if self.state != 'flagged':
-            self.state = 'opened'
+        if self.stateCode != STATE_FLAGGED:
+            self.stateCode = STATE_OPENED
 
 
-class MinesweeperModel:
+class MinesweeperBaseModel:
     """
-    Класс модели игры.
-    Определяет основную логику игры.
+    Общая часть моделей игры: правила ходов, проверка победы и поражения,
+    учет изменившихся ячеек и показатели поля.
+    Хранение ячеек определяют наследники. Общие методы обращаются к ячейкам
+    по линейному индексу index = row * columnCount + column через методы
+    наследника:
+        createCells() - создать закрытые пустые ячейки поля;
+        getState(index), setState(index, state) - код состояния ячейки;
+        isMined(index), getCounter(index) - мина и число мин вокруг;
+        openZeroArea(index, opened) - открыть область вокруг ячейки
+            с нулевым счетчиком, дописывая индексы открытых ячеек в opened;
+        getOpenedIndexes(), addMines(indexes), countAllMines() - расстановка мин;
+        getMineIndexes() - индексы заминированных ячеек;
+        getMinesAndCounters() - мины и счетчики всех ячеек для getMetrics;
+        getCell(row, column), getCellNeighbours(row, column) - объекты ячеек.
     """
+    maxRowCount = MAX_ROW_COUNT
+    maxColumnCount = MAX_COLUMN_COUNT
+    # Учет изменившихся ячеек включается trackDirtyCells.
+    dirtyTracking = False
+
     def __init__(self):
         self.startGame()
 
-    def startGame(self, rowCount = 15, columnCount = 15, mineCount = 28):
+    @classmethod
+    def clampSettings(cls, rowCount, columnCount, mineCount):
+        """
+        Возвращает (rowCount, columnCount, mineCount), приведенные к пределам
+        модели: размеры поля - от MIN_ROW_COUNT (MIN_COLUMN_COUNT) до maxRowCount
+        (maxColumnCount), число мин - от 1/8 до 6/8 числа ячеек.
+        """
+        rowCount = min(max(rowCount, MIN_ROW_COUNT), cls.maxRowCount)
+        columnCount = min(max(columnCount, MIN_COLUMN_COUNT), cls.maxColumnCount)
+        cellCount = rowCount * columnCount
+        mineCount = min(max(mineCount, round(cellCount * 1 / 8)), round(cellCount * 6 / 8))
+        return rowCount, columnCount, mineCount
+
+    def startGame(self, rowCount = 15, columnCount = 15, mineCount = 28, seed = None):
         """
         Игра начинается с этого метода, в котором определяются размеры поля,
         количество мин, инициализируются ячейки.
+        Размеры поля и число мин приводятся к пределам модели (см. clampSettings).
+        seed (число или random.Random) задает расстановку мин;
+        одинаковое зерно и первый ход дают одинаковое поле.
         """
-        if rowCount in range(MIN_ROW_COUNT, MAX_ROW_COUNT + 1):
-            self.rowCount = rowCount
-        # Для случаев, когда число строк выходит за допустимые пределы.
-        # Для столбцов аналогично.
-        elif rowCount < MIN_ROW_COUNT:
-            self.rowCount = MIN_ROW_COUNT
-        else:
-            self.rowCount = MAX_ROW_COUNT
+        self.rowCount, self.columnCount, self.mineCount = self.clampSettings(rowCount, columnCount, mineCount)
+        self.cellCount = self.rowCount * self.columnCount
+        self.min_mine = round(self.cellCount * 1 / 8)
+        self.max_mine = round(self.cellCount * 6 / 8)
 
-        if columnCount in range(MIN_COLUMN_COUNT, MAX_COLUMN_COUNT + 1):
-            self.columnCount = columnCount
-        elif columnCount < MIN_COLUMN_COUNT:
-            self.columnCount = MIN_COLUMN_COUNT
-        else:
-            self.columnCount = MAX_COLUMN_COUNT
-
-        self.min_mine = round(self.rowCount * self.columnCount * 1 / 8)       
-        self.max_mine = round(self.rowCount * self.columnCount * 6 / 8)
-        
-        if mineCount in range(self.min_mine, self.max_mine):
-            self.mineCount = mineCount
-        elif mineCount < self.min_mine:
-            self.mineCount = self.min_mine
-        else:
-            self.mineCount = self.max_mine
-        
+        self.seed, self.random = makeRandom(seed)
         self.firstStep = True
         self.gameOver = False
-        self.cellsTable = []
-        
-        for row in range(self.rowCount):
-            cellsRow = []
-            for column in range(self.columnCount):
-                cellsRow.append(MinesweeperCell(row, column))
-            self.cellsTable.append(cellsRow)
+        # Число незаминированных ячеек, которые еще предстоит открыть.
+        self.closedSafeCount = self.cellCount - self.mineCount
+        # Линейные индексы ячеек, изменившихся с момента последней
+        # синхронизации представления (см. popDirtyCells), или None,
+        # если учет не включен.
+        self.dirtyCells = set() if self.dirtyTracking else None
+        # Показатели сложности поля (см. getMetrics).
+        self.metrics = None
+        self.createCells()
 
-    def getCell(self, row, column):
+    def trackDirtyCells(self, enabled = True):
         """
-        Возвращает объект ячейки по адресу row : column.
+        Включает или выключает учет изменившихся ячеек для popDirtyCells.
+        Учет нужен только тому, кто забирает изменения (представлению,
+        серверу); без него модель не тратит память на каждую открытую ячейку.
         """
-        if row < 0 or column < 0 or row >= self.rowCount or column >= self.columnCount:
-            return None
-        return self.cellsTable[row][column]
+        self.dirtyTracking = enabled
+        self.dirtyCells = set() if enabled else None
 
     def isWin(self):
         """
-        Метод возвращает True, если каждая ячейка соответствует одному из условий
-        Победы, а именно:
-            - Ячейка заминирована, но не открыта.
-            - Ячейка открыта.
-            - Ячейка помечена флагом и заминирована.
+        Возвращает True, если открыты все незаминированные ячейки
+        и ни одна мина не открыта.
+        Проверка выполняется за постоянное время по счетчику
+        self.closedSafeCount, который уменьшается при открытии ячеек.
         """
-        for row in range(self.rowCount):
-            for column in range(self.columnCount):
-                cell = self.cellsTable[row][column]
-                # if not cell.mined and cell.state != 'opened' and cell.state != 'flagged':
-                if not cell.mined and cell.state != 'opened':
-                    return False
-                elif cell.mined and cell.state == 'opened':
-                    self.gameOver = True
-                    return False
-        return True
+        return not self.gameOver and self.closedSafeCount == 0
 
     def isGameOver(self):
         """
-        Возращает значение self.gameOver, которое устанавливается в истину,
+        Возвращает значение self.gameOver, которое устанавливается в истину,
         в случае поражения.
         """
         return self.gameOver
 
-    def openCell(self, row,column):
+    def openCell(self, row, column, collect = True):
         """
         Метод открытия ячеек.
         Во время первого хода происходит генерация заминированных полей.
         Если открываемая ячейка заминирована - игра окончена.
         Если вокруг ячейки нет мин, то выполняется открытие соседних ячеек.
+        Ячейки, помеченные флажком, не открываются.
+        Возвращает список адресов (row, column) открытых ячеек;
+        при collect = False список не строится и возвращается None.
         """
-        cell = self.getCell(row, column)
-        if not cell:
-            return
+        empty = [] if collect else None
+        if row < 0 or column < 0 or row >= self.rowCount or column >= self.columnCount:
+            return empty
 
-        cell.open()
+        index = row * self.columnCount + column
+        state = self.getState(index)
+        if state == STATE_FLAGGED:
+            return empty
 
-        if cell.mined:
-            self.gameOver = True
-            return
+        # Индексы открытых ячеек собираются, только если они кому-то нужны.
+        opened = [] if collect or self.dirtyCells is not None else None
+        if state != STATE_OPENED:
+            self.setState(index, STATE_OPENED)
+            if opened is not None:
+                opened.append(index)
+            if self.isMined(index):
+                self.gameOver = True
+                return self.reportOpened(opened, collect)
+            self.closedSafeCount -= 1
 
         if self.firstStep:
             self.firstStep = False
             self.generateMines()
 
-        cell.counter = self.countMinesAroundCell(row, column)
-        if cell.counter == 0:
-            self.openNeighbours(row, column)
+        if self.getCounter(index) == 0:
+            self.openZeroArea(index, opened)
+        return self.reportOpened(opened, collect)
+
+    def reportOpened(self, opened, collect):
+        """
+        Отмечает ячейки с линейными индексами opened как изменившиеся
+        и, если collect, возвращает список их адресов (row, column).
+        """
+        if self.dirtyCells is not None:
+            self.dirtyCells.update(opened)
+        if collect:
+            columnCount = self.columnCount
+            return [divmod(index, columnCount) for index in opened]
+        return None
 
     def countFlaggedNeighbours(self, row, column):
         """
-        Метод возращает количество соседних полей помеченных флажком.
+        Метод возвращает количество соседних полей помеченных флажком.
         """
-        neighbours = self.getCellNeighbours(row, column)
-        count = 0
-        for n in neighbours:
-            if n.state == 'flagged':
-                count +=1
-        return count
+        index = row * self.columnCount + column
+        return sum(1 for n in self.getNeighbourIndexes(index) if self.getState(n) == STATE_FLAGGED)
 
-    def openNeighbours(self, row, column):
+    def openNeighbours(self, row, column, collect = True):
         """
-        Метод окрытия соседних полей.
+        Метод открытия соседних полей.
         Поля вокруг ячейки с адресом (row;column) открываются, и если
         среди них есть заминированное поле не помеченное флажком - игра окончена.
+        Возвращает список адресов (row, column) открытых ячеек
+        (None при collect = False).
         """
-        neighbours = self.getCellNeighbours(row, column)
-        for n in neighbours:
-            if n.state == 'closed':
-                self.openCell(n.row, n.column)
-            if n.mined and not n.state == 'flagged':
+        opened = [] if collect else None
+        for n in self.getNeighbourIndexes(row * self.columnCount + column):
+            if self.getState(n) == STATE_CLOSED:
+                cells = self.openCell(*divmod(n, self.columnCount), collect)
+                if collect:
+                    opened.extend(cells)
+            if self.isMined(n) and self.getState(n) != STATE_FLAGGED:
                 self.gameOver = True
-                return
+                break
+        return opened
 
-    def openClearNeighbours(self, row, column):
+    def openClearNeighbours(self, row, column, collect = True):
         """
         Метод открывает ячейки вокруг поля (row;column), если
-        числомин вокруг данного поля равно числу полей помеченных флажком.
+        число мин вокруг данного поля равно числу полей помеченных флажком.
+        Возвращает список адресов (row, column) открытых ячеек
+        (None при collect = False).
         """
-        count_mines = self.countMinesAroundCell(row,column)
+        if row < 0 or column < 0 or row >= self.rowCount or column >= self.columnCount:
+            return [] if collect else None
+        count_mines = self.countMinesAroundCell(row, column)
         count_flags = self.countFlaggedNeighbours(row, column)
 
         if count_mines == count_flags:
-            self.openNeighbours(row, column)
+            return self.openNeighbours(row, column, collect)
+        return [] if collect else None
 
     def nextCellMark(self, row, column):
         """
         Циклически меняет метку поля.
         """
-        cell = self.getCell(row, column)
-        if cell:
-            cell.nextMark()
+        if row < 0 or column < 0 or row >= self.rowCount or column >= self.columnCount:
+            return
+        index = row * self.columnCount + column
+        state = self.getState(index)
+        if state == STATE_OPENED:
+            return
+        self.setState(index, NEXT_MARK[state])
+        if self.dirtyCells is not None:
+            self.dirtyCells.add(index)
+
+    def popDirtyCells(self):
+        """
+        Возвращает список адресов (row, column) ячеек, изменившихся
+        с момента предыдущего вызова, и очищает учет.
+        Без trackDirtyCells список всегда пуст.
+        """
+        if not self.dirtyCells:
+            return []
+        dirtyCells = self.dirtyCells
+        self.dirtyCells = set()
+        columnCount = self.columnCount
+        return [divmod(index, columnCount) for index in dirtyCells]
 
     def generateMines(self):
         """
         Метод генерации мин на поле.
-        Метод выполняется после первого хода. Открытая в первом
-        ходе ячейка не может быть заминирована.
-        """
-        for i in range(self.mineCount):
-            while True:
-                row = random.randint(0, self.rowCount - 1)
-                column = random.randint(0, self.columnCount -1)
-                cell = self.getCell(row, column)
-                if not cell.state == 'opened' and not cell.mined:
-                    cell.mined = True
-                    break
+        Метод выполняется после первого хода. Открытые к этому
+        моменту ячейки не могут быть заминированы.
+        Мины расставляются за один проход по выборке свободных
+        ячеек, сделанной генератором self.random.
+        """
+        excluded = set(self.getOpenedIndexes())
+        self.addMines(sampleMines(self.random, self.cellCount, self.mineCount, excluded))
+        self.countAllMines()
+        self.metrics = None
+
+    def placeMines(self, indexes):
+        """
+        Расставляет мины в ячейки с заданными линейными индексами
+        (row * columnCount + column) вместо случайной генерации.
+        Вызывается сразу после startGame, до первого хода; число мин
+        берется по раскладке и не приводится к пределам clampSettings.
+        """
+        indexes = set(indexes)
+        self.mineCount = len(indexes)
+        self.closedSafeCount = self.cellCount - self.mineCount
+        self.firstStep = False
+        self.addMines(indexes)
+        self.countAllMines()
+        self.metrics = None
 
     def countMinesAroundCell(self, row, column):
         """
-        Метод подсчета заминированных ячеек вокруг данной.
+        Возвращает число заминированных ячеек вокруг данной.
+        Счетчики вычисляются заранее при генерации мин.
+        """
+        return self.getCounter(row * self.columnCount + column)
+
+    def getMetrics(self):
+        """
+        Возвращает BoardMetrics (3BV и связанные показатели) текущего поля
+        или None, если мины еще не расставлены. Показатели вычисляются
+        при первом обращении и хранятся до следующей расстановки мин.
+        """
+        if self.firstStep:
+            return None
+        if self.metrics is None:
+            self.metrics = countBoardMetrics(self.rowCount, self.columnCount, *self.getMinesAndCounters())
+        return self.metrics
+
+    def getNeighbourIndexes(self, index):
+        """
+        Возвращает список линейных индексов соседних ячеек.
         """
-        neighbours = self.getCellNeighbours(row, column)
-        return sum(1 for n in neighbours if n.mined)
+        columnCount = self.columnCount
+        row, column = divmod(index, columnCount)
+        first = column - 1 if column > 0 else column
+        last = column + 2 if column < columnCount - 1 else column + 1
+        neighbours = []
+        if row > 0:
+            start = index - columnCount
+            neighbours.extend(range(start - column + first, start - column + last))
+        if column > 0:
+            neighbours.append(index - 1)
+        if column < columnCount - 1:
+            neighbours.append(index + 1)
+        if row < self.rowCount - 1:
+            start = index + columnCount
+            neighbours.extend(range(start - column + first, start - column + last))
+        return neighbours
+
+
+class MinesweeperModel(MinesweeperBaseModel):
+    """
+    Класс модели игры.
+    Определяет основную логику игры.
+    Ячейки поля - объекты MinesweeperCell: таблица cellsTable по строкам
+    и плоский список cells в порядке линейных индексов.
+    """
+    def createCells(self):
+        self.cellsTable = []
+        for row in range(self.rowCount):
+            cellsRow = []
+            for column in range(self.columnCount):
+                cellsRow.append(MinesweeperCell(row, column))
+            self.cellsTable.append(cellsRow)
+        self.cells = [cell for cellsRow in self.cellsTable for cell in cellsRow]
+
+    def getCell(self, row, column):
+        """
+        Возвращает объект ячейки по адресу row : column.
+        """
+        if row < 0 or column < 0 or row >= self.rowCount or column >= self.columnCount:
+            return None
+        return self.cellsTable[row][column]
+
+    def getState(self, index):
+        return self.cells[index].stateCode
+
+    def setState(self, index, state):
+        self.cells[index].stateCode = state
+
+    def isMined(self, index):
+        return self.cells[index].mined
+
+    def getCounter(self, index):
+        return self.cells[index].counter
+
+    def openZeroArea(self, index, opened = None):
+        """
+        Открывает область вокруг ячейки с нулевым счетчиком.
+        Обход выполняется с помощью очереди, а не рекурсии, поэтому
+        каждая ячейка посещается не более одного раза.
+        Линейные индексы открытых ячеек дописываются в список opened, если он задан.
+        """
+        columnCount = self.columnCount
+        count = 0
+        queue = deque([self.cells[index]])
+        while queue:
+            cell = queue.popleft()
+            for n in self.getCellNeighbours(cell.row, cell.column):
+                if n.stateCode == STATE_CLOSED:
+                    n.stateCode = STATE_OPENED
+                    count += 1
+                    if opened is not None:
+                        opened.append(n.row * columnCount + n.column)
+                    if n.counter == 0:
+                        queue.append(n)
+        self.closedSafeCount -= count
+
+    def getOpenedIndexes(self):
+        return [index for index, cell in enumerate(self.cells) if cell.stateCode == STATE_OPENED]
+
+    def getMineIndexes(self):
+        return [index for index, cell in enumerate(self.cells) if cell.mined]
+
+    def addMines(self, indexes):
+        for index in indexes:
+            self.cells[index].mined = True
+
+    def countAllMines(self):
+        """
+        Вычисляет счетчики мин для всех ячеек поля за один проход:
+        каждая мина увеличивает счетчики своих соседей.
+        """
+        for cell in self.cells:
+            cell.counter = 0
+        for cell in self.cells:
+            if cell.mined:
+                for n in self.getCellNeighbours(cell.row, cell.column):
+                    n.counter += 1
+
+    def getMinesAndCounters(self):
+        return [cell.mined for cell in self.cells], [cell.counter for cell in self.cells]
 
     def getCellNeighbours(self, row, column):
         """
         Возвращает список соседних ячеек.
         """
+        first = max(column - 1, 0)
+        last = min(column + 2, self.columnCount)
         neighbours = []
-        for r in range(row - 1, row + 2):
-            neighbours.append(self.getCell(r, column - 1))
-            if r != row:
-                neighbours.append(self.getCell(r, column))
-            neighbours.append(self.getCell(r, column + 1))
+        for r in range(max(row - 1, 0), min(row + 2, self.rowCount)):
+            cellsRow = self.cellsTable[r]
+            for c in range(first, last):
+                if r != row or c != column:
+                    neighbours.append(cellsRow[c])
+        return neighbours
+
+class MinesweeperArrayCell:
+    """
+    Легковесное представление ячейки модели MinesweeperArrayModel.
+    Не хранит собственного состояния, а читает его из массивов модели,
+    поэтому совместимо с представлением, работающим с MinesweeperCell.
+    """
+    __slots__ = ('model', 'row', 'column', 'index')
+
+    def __init__(self, model, row, column):
+        self.model = model
+        self.row = row
+        self.column = column
+        self.index = row * model.columnCount + column
+
+    @property
+    def state(self):
+        return STATE_NAMES[self.model.states[self.index]]
+
+    @property
+    def mined(self):
+        return bool(self.model.mines[self.index])
+
+    @property
+    def counter(self):
+        return self.model.counters[self.index]
+
 
-        return filter(lambda n: n is not None, neighbours)
+class MinesweeperArrayModel(MinesweeperBaseModel):
+    """
+    Класс модели игры на плоских массивах.
+    Мины, состояния и счетчики ячеек хранятся в bytearray по одному
+    байту на ячейку, что позволяет играть на полях 2000x2000 и больше.
+    Интерфейс совпадает с MinesweeperModel.
+    """
+    maxRowCount = MAX_ARRAY_ROW_COUNT
+    maxColumnCount = MAX_ARRAY_COLUMN_COUNT
+
+    def createCells(self):
+        self.mines = bytearray(self.cellCount)
+        self.states = bytearray(self.cellCount)
+        self.counters = bytearray(self.cellCount)
+
+    def getCell(self, row, column):
+        """
+        Возвращает представление ячейки по адресу row : column.
+        """
+        if row < 0 or column < 0 or row >= self.rowCount or column >= self.columnCount:
+            return None
+        return MinesweeperArrayCell(self, row, column)
+
+    def getState(self, index):
+        return self.states[index]
+
+    def setState(self, index, state):
+        self.states[index] = state
+
+    def isMined(self, index):
+        return self.mines[index]
+
+    def getCounter(self, index):
+        return self.counters[index]
+
+    def openZeroArea(self, index, opened = None):
+        """
+        Открывает область вокруг ячейки с нулевым счетчиком.
+        Обход выполняется с помощью очереди, а не рекурсии, поэтому
+        каждая ячейка посещается не более одного раза.
+        Линейные индексы открытых ячеек дописываются в список opened, если он задан.
+        """
+        states = self.states
+        counters = self.counters
+        count = 0
+        queue = deque([index])
+        while queue:
+            index = queue.popleft()
+            for n in self.getNeighbourIndexes(index):
+                if states[n] == STATE_CLOSED:
+                    states[n] = STATE_OPENED
+                    count += 1
+                    if opened is not None:
+                        opened.append(n)
+                    if counters[n] == 0:
+                        queue.append(n)
+        self.closedSafeCount -= count
+
+    def getOpenedIndexes(self):
+        opened = []
+        index = self.states.find(STATE_OPENED)
+        while index != -1:
+            opened.append(index)
+            index = self.states.find(STATE_OPENED, index + 1)
+        return opened
+
+    def getMineIndexes(self):
+        mines = []
+        index = self.mines.find(1)
+        while index != -1:
+            mines.append(index)
+            index = self.mines.find(1, index + 1)
+        return mines
+
+    def addMines(self, indexes):
+        mines = self.mines
+        for index in indexes:
+            mines[index] = 1
+
+    def countAllMines(self):
+        """
+        Вычисляет счетчики мин для всех ячеек поля разом.
+        Массив мин рассматривается как одно большое целое число
+        (по байту на ячейку), и свертка 3x3 сводится к сдвигам и сложениям:
+        счетчик не превышает 8, поэтому переносов между байтами не бывает.
+        """
+        columnCount = self.columnCount
+        size = self.cellCount * 8
+        mines = int.from_bytes(self.mines, 'little')
+        notFirstColumn = int.from_bytes((b'\x00' + b'\xff' * (columnCount - 1)) * self.rowCount, 'little')
+        notLastColumn = int.from_bytes((b'\xff' * (columnCount - 1) + b'\x00') * self.rowCount, 'little')
+
+        row = mines + ((mines << 8) & notFirstColumn) + ((mines >> 8) & notLastColumn)
+        shift = columnCount * 8
+        total = row + ((row << shift) & ((1 << size) - 1)) + (row >> shift)
+        self.counters = bytearray((total - mines).to_bytes(self.cellCount, 'little'))
+
+    def getMinesAndCounters(self):
+        return self.mines, self.counters
+
+    def getCellNeighbours(self, row, column):
+        """
+        Возвращает список соседних ячеек.
+        """
+        return [
+                MinesweeperArrayCell(self, *divmod(n, self.columnCount))
+                for n in self.getNeighbourIndexes(row * self.columnCount + column)
+        ]
 
 class MinesweeperView(Frame):
     """
     Класс представления.
     Определяет графический пользовательский интерфейс.
     """
+    # Наибольший размер поля. На каждую ячейку создается кнопка Tk,
+    # поэтому поле не больше пределов MinesweeperModel при любой модели.
+    maxRowCount = MAX_ROW_COUNT
+    maxColumnCount = MAX_COLUMN_COUNT
+
     def __init__(self, model, controller, parent = None):
         Frame.__init__(self, parent)
         self.model = model
+        # Представление перерисовывает только изменившиеся ячейки.
+        model.trackDirtyCells()
         self.controller = controller
         self.controller.setView(self)
         self.createBoard()
@@ -258,7 +708,10 @@ class MinesweeperView(Frame):
         panel = Frame(self)
         panel.pack(side = BOTTOM, fill = X)
 
-        Button(panel, text = 'New Game', command = self.controller.startNewGame).pack(side = RIGHT)
+        Button(panel, text = 'New Game', command = lambda: self.controller.startNewGame()).pack(side = RIGHT)
+
+        self.status = Label(panel, text = '')
+        self.status.pack(side = LEFT)
         
         self.mineCount = StringVar(panel)
         self.mineCount.set(self.model.mineCount)
@@ -275,7 +728,7 @@ class MinesweeperView(Frame):
         Spinbox(
                 panel,
                 from_ = MIN_ROW_COUNT,
-                to = MAX_ROW_COUNT,
+                to = min(self.maxRowCount, model.maxRowCount),
                 textvariable = self.rowCount,
                 width = 5
         ).pack(side = RIGHT)
@@ -288,38 +741,59 @@ class MinesweeperView(Frame):
         Spinbox(
                 panel,
                 from_ = MIN_COLUMN_COUNT,
-                to = MAX_COLUMN_COUNT,
+                to = min(self.maxColumnCount, model.maxColumnCount),
                 textvariable = self.columnCount,
                 width = 5
         ).pack(side = RIGHT)
         Label(panel, text = 'Board size: ').pack(side = RIGHT)
 
-    def syncWithModel(self):
+    def setStatus(self, text):
+        """
+        Показывает текст в строке состояния.
+        """
+        self.status.config(text = text)
+
+    def syncWithModel(self, full = False):
         """
         Метод синхронизации представления с модлью.
+        Перерисовываются только ячейки, изменившиеся в модели.
+        Полная перерисовка выполняется при full = True
+        и по окончании игры, чтобы показать все мины.
         """
-        for row in range(self.model.rowCount):
-            for column in range(self.model.columnCount):
-                cell = self.model.getCell(row, column)
-                if cell:
-                    btn = self.buttonsTable[row][column]
-
-                    if cell.state == 'closed':
-                        btn.config(bg = 'lightblue', text = '')
-                    elif cell.state == 'opened':
-                        btn.config(relief = SUNKEN, bg='white', text='')
-                        if cell.counter > 0:
-                            btn.config(text = cell.counter)
-                    elif cell.state == 'flagged':
-                        btn.config(bg = 'orange', text = 'P')
-                    elif cell.state == 'questioned':
-                        btn.config(bg = 'yellow', text = '?')
-                    
-                    if self.model.isGameOver() and cell.mined:
-                        if cell.state == 'opened':
-                            btn.config(bg = 'red', fg = 'white', text = ':x')
-                        else:
-                            btn.config(bg = 'purple', fg = 'white', text = 'x')
+        dirtyCells = self.model.popDirtyCells()
+        if full or self.model.isGameOver():
+            for row in range(self.model.rowCount):
+                for column in range(self.model.columnCount):
+                    self.drawCell(row, column)
+        else:
+            for row, column in dirtyCells:
+                self.drawCell(row, column)
+
+    def drawCell(self, row, column):
+        """
+        Приводит кнопку ячейки (row;column) в соответствие с моделью.
+        """
+        cell = self.model.getCell(row, column)
+        if not cell:
+            return
+        btn = self.buttonsTable[row][column]
+
+        if cell.state == 'closed':
+            btn.config(bg = 'lightblue', text = '')
+        elif cell.state == 'opened':
+            btn.config(relief = SUNKEN, bg='white', text='')
+            if cell.counter > 0:
+                btn.config(text = cell.counter)
+        elif cell.state == 'flagged':
+            btn.config(bg = 'orange', text = 'P')
+        elif cell.state == 'questioned':
+            btn.config(bg = 'yellow', text = '?')
+
+        if self.model.isGameOver() and cell.mined:
+            if cell.state == 'opened':
+                btn.config(bg = 'red', fg = 'white', text = ':x')
+            else:
+                btn.config(bg = 'purple', fg = 'white', text = 'x')
 
     def blockCell(self, row, column, block = True):
         """
@@ -390,13 +864,160 @@ class MinesweeperView(Frame):
     def showGameOverMessage(self):
         tkinter.messagebox.showinfo('Game Over!', 'You lose! 8x')
 
+class MinesweeperCanvasView(MinesweeperView):
+    """
+    Представление, рисующее игровое поле на едином холсте Canvas:
+    по одному прямоугольнику и одной надписи на ячейку.
+    Ячейка под курсором определяется по координатам щелчка.
+    Холст переиспользуется, если размер нового поля не изменился.
+    Размер поля ограничен только пределами модели.
+    """
+    maxRowCount = MAX_ARRAY_ROW_COUNT
+    maxColumnCount = MAX_ARRAY_COLUMN_COUNT
+
+    def createBoard(self):
+        """
+        Метод создает графическое представление игрового поля.
+        """
+        try:
+            self.rowCount.set(self.model.rowCount)
+            self.columnCount.set(self.model.columnCount)
+            self.mineCount.set(self.model.mineCount)
+        except AttributeError:
+            pass
+
+        self.blockedCells = set()
+        boardSize = (self.model.rowCount, self.model.columnCount)
+        if getattr(self, 'boardSize', None) == boardSize:
+            self.syncWithModel(full = True)
+            return
+
+        try:
+            self.board.pack_forget()
+            self.board.destroy()
+        except AttributeError:
+            pass
+
+        self.boardSize = boardSize
+        self.board = Canvas(
+                self,
+                width = self.model.columnCount * CELL_SIZE,
+                height = self.model.rowCount * CELL_SIZE,
+                highlightthickness = 0
+        )
+        self.board.pack()
+        self.rectangles = []
+        self.labels = []
+        for row in range(self.model.rowCount):
+            y = row * CELL_SIZE
+            for column in range(self.model.columnCount):
+                x = column * CELL_SIZE
+                self.rectangles.append(self.board.create_rectangle(
+                        x, y, x + CELL_SIZE, y + CELL_SIZE,
+                        fill = 'lightblue',
+                        outline = 'gray'
+                ))
+                self.labels.append(self.board.create_text(
+                        x + CELL_SIZE // 2, y + CELL_SIZE // 2,
+                        text = ''
+                ))
+
+        self.board.bind('<Button-1>', self.onCanvasClick)
+        self.board.bind('<Button-3>', self.onCanvasClick)
+        self.board.bind('<Button-2>', self.onCanvasClick)
+
+    def getCellAt(self, x, y):
+        """
+        Возвращает адрес (row, column) ячейки, в которую попадает
+        точка холста (x;y), или None.
+        """
+        row, column = int(y // CELL_SIZE), int(x // CELL_SIZE)
+        if 0 <= row < self.model.rowCount and 0 <= column < self.model.columnCount:
+            return row, column
+        return None
+
+    def onCanvasClick(self, event):
+        """
+        Обработчик щелчков по холсту, передающий их контроллеру.
+        """
+        address = self.getCellAt(self.board.canvasx(event.x), self.board.canvasy(event.y))
+        if not address:
+            return
+        if event.num == 1:
+            if address not in self.blockedCells:
+                self.controller.onLeftClick(*address)
+        elif event.num == 3:
+            self.controller.onRightClick(*address)
+        elif event.num == 2:
+            self.controller.onMiddleClick(*address)
+
+    def drawCell(self, row, column):
+        """
+        Приводит прямоугольник и надпись ячейки (row;column) в соответствие с моделью.
+        """
+        cell = self.model.getCell(row, column)
+        if not cell:
+            return
+        index = row * self.model.columnCount + column
+
+        fill, text, color = 'lightblue', '', 'black'
+        if cell.state == 'opened':
+            fill = 'white'
+            if cell.counter > 0:
+                text = cell.counter
+        elif cell.state == 'flagged':
+            fill, text = 'orange', 'P'
+        elif cell.state == 'questioned':
+            fill, text = 'yellow', '?'
+
+        if self.model.isGameOver() and cell.mined:
+            if cell.state == 'opened':
+                fill, text, color = 'red', ':x', 'white'
+            else:
+                fill, text, color = 'purple', 'x', 'white'
+
+        self.board.itemconfig(self.rectangles[index], fill = fill)
+        self.board.itemconfig(self.labels[index], text = text, fill = color)
+
+    def blockCell(self, row, column, block = True):
+        """
+        Метод блокирует заданную ячейку для ЛКМ.
+        """
+        if block:
+            self.blockedCells.add((row, column))
+        else:
+            self.blockedCells.discard((row, column))
+
 class MinesweeperController:
     """
     Класс контроллера.
     Обеспечивает взаимодействи модели и представления.
+    Щелчки не обрабатываются сразу, а ставятся в очередь, которая
+    разбирается в простое цикла событий Tk порциями не дольше
+    EVENT_TIME_BUDGET; запросы перерисовки, пришедшие подряд,
+    сливаются в одну перерисовку.
+    Если задан журнал moveLog (см. minesweeper_replay.MoveLog),
+    в него записываются все новые игры и выполненные ходы игрока.
+    Если задан запас полей boardPool (см. minesweeper_noguess.BoardPool),
+    новые игры берутся из него и начинаются с хода в стартовую ячейку,
+    после которого поле решается без угадывания. Пока готового поля
+    в запасе нет, контроллер опрашивает запас каждые NOGUESS_POLL_INTERVAL мс,
+    показывая строку состояния, и не принимает щелчков. Если запас
+    отказался от этих параметров, игра начинается на обычном поле
+    с предупреждением в строке состояния.
     """
-    def __init__(self, model):
+    def __init__(self, model, moveLog = None, boardPool = None):
         self.model = model
+        self.moveLog = moveLog
+        self.boardPool = boardPool
+        self.pendingEvents = deque()
+        self.processingScheduled = False
+        self.redrawScheduled = False
+        # Параметры игры, для которой ожидается поле из запаса, или None.
+        self.waitingSettings = None
+        self.pollScheduled = False
+        if moveLog:
+            moveLog.recordNewGame(model.rowCount, model.columnCount, model.mineCount, model.seed)
 
     def setView(self, view):
         self.view = view
@@ -404,35 +1025,144 @@ class MinesweeperController:
     def startNewGame(self):
         gameSettings = self.view.getGameSettings()
         try:
-            self.model.startGame(*map(int, gameSettings))
+            settings = tuple(map(int, gameSettings))
         except:
-            self.model.startGame(self.model.rowCount, self.model.columnCount, self.model.mineCount)
+            settings = (self.model.rowCount, self.model.columnCount, self.model.mineCount)
+        # В Spinbox можно ввести число больше предела, а поле не должно
+        # быть больше, чем может показать представление. Параметры
+        # приводятся к пределам модели заранее, чтобы поле из запаса
+        # генерировалось ровно для того поля, которое сыграет модель.
+        rowCount, columnCount, mineCount = settings
+        settings = self.model.clampSettings(
+                min(rowCount, self.view.maxRowCount), min(columnCount, self.view.maxColumnCount), mineCount)
+        if not self.boardPool:
+            self.startBoard(settings)
+            return
+        # Если опрос уже запланирован, он подхватит новые параметры.
+        self.waitingSettings = settings
+        if not self.pollScheduled:
+            self.pollBoardPool()
+
+    def pollBoardPool(self):
+        """
+        Начинает ожидаемую игру на поле из запаса, если оно готово.
+        Иначе повторяет опрос через NOGUESS_POLL_INTERVAL мс или, если
+        запас не может дать поле для этих параметров, начинает игру
+        на обычном поле.
+        """
+        self.pollScheduled = False
+        settings = self.waitingSettings
+        if settings is None:
+            return
+        try:
+            board = self.boardPool.get(*settings)
+            available = not self.boardPool.isExhausted(*settings)
+        except Exception:
+            board, available = None, False
+        if board is None and available:
+            self.view.setStatus('Generating a no-guess board...')
+            self.pollScheduled = True
+            self.view.after(NOGUESS_POLL_INTERVAL, self.pollBoardPool)
+            return
+        self.waitingSettings = None
+        self.view.setStatus('' if board else 'No no-guess board for these settings, guessing may be needed')
+        self.startBoard(settings, board)
+
+    def startBoard(self, settings, board = None):
+        """
+        Начинает игру с параметрами settings на поле board из запаса
+        или, если его нет, на обычном поле.
+        """
+        if board:
+            self.model.startGame(board.rowCount, board.columnCount, board.mineCount, board.seed)
+        else:
+            self.model.startGame(*settings)
+        # Щелчки, не успевшие обработаться, относятся к прежнему полю.
+        self.pendingEvents.clear()
+        if self.moveLog:
+            self.moveLog.recordNewGame(self.model.rowCount, self.model.columnCount,
+                    self.model.mineCount, self.model.seed)
 
         self.view.createBoard()
+        if board:
+            self.queueEvent('open', *board.startCell)
 
     def onLeftClick(self, row, column):
         """
         Обработчик нажатия левой кнопки мыши.
         """
-        self.model.openCell(row, column)
-        self.checkStateGame()
+        self.queueEvent('open', row, column)
 
     def onRightClick(self, row, column):
         """
         Обработчик нажатия правой кнопки мыши.
         """
-        self.model.nextCellMark(row, column)
-        self.view.blockCell(row, column, self.model.getCell(row, column).state == 'flagged')
-        self.view.syncWithModel()
+        self.queueEvent('mark', row, column)
 
     def onMiddleClick(self, row, column):
         """
         Клик СКМ по открытой клетке открывает соседние ячейки, если число помеченных флагом
         мин соответствует числу в ячейке.
         """
-        self.model.openClearNeighbours(row, column)
-        self.checkStateGame()
-    
+        self.queueEvent('chord', row, column)
+
+    def queueEvent(self, action, row, column):
+        """
+        Ставит действие в очередь и планирует ее разбор.
+        Пока ожидается поле из запаса, щелчки не принимаются.
+        """
+        if self.waitingSettings is not None:
+            return
+        self.pendingEvents.append((action, row, column))
+        if not self.processingScheduled:
+            self.processingScheduled = True
+            self.view.after_idle(self.processEvents)
+
+    def processEvents(self):
+        """
+        Выполняет действия из очереди. Если разбор занимает больше
+        EVENT_TIME_BUDGET, остаток откладывается, чтобы цикл событий
+        успел обработать ввод. Перерисовка запрашивается один раз на порцию.
+        """
+        self.processingScheduled = False
+        deadline = time.perf_counter() + EVENT_TIME_BUDGET
+        while self.pendingEvents:
+            action, row, column = self.pendingEvents.popleft()
+            if self.moveLog:
+                self.moveLog.recordMove(action, row, column)
+            if action == 'open':
+                self.model.openCell(row, column, False)
+            elif action == 'chord':
+                self.model.openClearNeighbours(row, column, False)
+            else:
+                self.model.nextCellMark(row, column)
+                self.view.blockCell(row, column, self.model.getCell(row, column).state == 'flagged')
+
+            if self.model.isWin() or self.model.isGameOver():
+                self.pendingEvents.clear()
+                self.checkStateGame()
+                return
+            if time.perf_counter() > deadline:
+                break
+
+        if self.pendingEvents:
+            self.processingScheduled = True
+            self.view.after(1, self.processEvents)
+        self.requestRedraw()
+
+    def requestRedraw(self):
+        """
+        Планирует перерисовку на время простоя; повторные запросы
+        до ее выполнения ничего не добавляют.
+        """
+        if not self.redrawScheduled:
+            self.redrawScheduled = True
+            self.view.after_idle(self.redraw)
+
+    def redraw(self):
+        self.redrawScheduled = False
+        self.view.syncWithModel()
+
     def checkStateGame(self):
         """
         Выполняет проверку состояния игры, и если игрок выиграл или проиграл
@@ -447,15 +1177,47 @@ class MinesweeperController:
             self.view.showGameOverMessage()
             self.startNewGame()
         else:
-            self.view.syncWithModel()
+            self.requestRedraw()
 
 
 def main(argv=sys.argv):
-    model = MinesweeperModel()
-    controller = MinesweeperController(model)
-    view = MinesweeperView(model, controller)
+    if '--array' in argv:
+        model = MinesweeperArrayModel()
+    else:
+        model = MinesweeperModel()
+    # --record FILE - записать журнал ходов в файл FILE при выходе.
+    moveLog = None
+    if '--record' in argv:
+        from minesweeper_replay import MoveLog
+        moveLog = MoveLog()
+    # --noguess - играть только на полях, решаемых без угадывания.
+    boardPool = None
+    if '--noguess' in argv:
+        from minesweeper_noguess import BoardPool
+        boardPool = BoardPool()
+        # Запас для параметров по умолчанию готовится, пока создается окно.
+        boardPool.refill(model.rowCount, model.columnCount, model.mineCount)
+    controller = MinesweeperController(model, moveLog, boardPool)
+    if '--canvas' in argv:
+        view = MinesweeperCanvasView(model, controller)
+    else:
+        view = MinesweeperView(model, controller)
+    # --profile - замерять обработку событий и вывести сводку при выходе.
+    sink = None
+    if '--profile' in argv:
+        from minesweeper_instrument import instrument, HistogramSink
+        sink = HistogramSink()
+        instrument(controller, sink)
+    if boardPool:
+        controller.startNewGame()
     view.pack()
     view.mainloop()
+    if boardPool:
+        boardPool.close()
+    if sink:
+        print(sink.report())
+    if moveLog:
+        moveLog.save(argv[argv.index('--record') + 1])
 
 if __name__ == "__main__":
     sys.exit(main())
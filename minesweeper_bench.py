@@ -0,0 +1,249 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Набор замеров производительности горячих участков модели Сапера.
+Замеряются startGame, generateMines, каскад openCell, openClearNeighbours,
+isWin, getCellNeighbours и getMetrics на полях разных размеров и плотностей
+с фиксированными зернами, а также худший случай openCell - один каскад
+на все поле с единственной миной (для движка на массивах, кроме того,
+на поле 1000x1000). Каждый замер повторяется, пока
+суммарное время не достигнет MIN_TIME, и время делится на число
+повторений. Результат пишется в JSON и может сравниваться с сохраненным
+эталоном: при замедлении сверх допуска программа завершается
+с ненулевым кодом.
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+
+from minesweeper import MinesweeperModel, MinesweeperArrayModel
+
+ENGINES = {
+    'object': (MinesweeperModel, (10, 30)),
+    'array': (MinesweeperArrayModel, (100, 500)),
+}
+
+DENSITIES = (1 / 8, 6 / 8)
+
+# Дополнительные размеры поля для отдельных замеров движка.
+EXTRA_SIZES = {
+    ('array', 'openCascade'): (1000,),
+}
+
+SEED = 20240229
+
+# Наименьшее суммарное время одного замера, секунды.
+MIN_TIME = 0.05
+# Наибольшее время одного замера вместе с подготовкой поля, секунды.
+MAX_WALL_TIME = 1.0
+# Замедление меньше этого (в секундах) не считается регрессией.
+NOISE_FLOOR = 0.0001
+
+def prepareBoard(model, size, density, generate = True):
+    """
+    Начинает игру с фиксированным зерном и при необходимости
+    расставляет мины, не открывая ни одной ячейки.
+    """
+    model.startGame(size, size, round(size * size * density), SEED)
+    if generate:
+        model.firstStep = False
+        model.generateMines()
+
+def prepareSingleMine(model, size):
+    """
+    Ставит на поле единственную мину в угол (0, 0): ход
+    в противоположный угол открывает все поле одним каскадом.
+    """
+    model.startGame(size, size, 1, SEED)
+    model.placeMines([0])
+
+def openAllSafeCells(model):
+    for row in range(model.rowCount):
+        for column in range(model.columnCount):
+            cell = model.getCell(row, column)
+            if not cell.mined and cell.state == 'closed':
+                model.openCell(row, column)
+
+def benchStartGame(model, size, density):
+    started = time.perf_counter()
+    prepareBoard(model, size, density, False)
+    return time.perf_counter() - started
+
+def benchGenerateMines(model, size, density):
+    prepareBoard(model, size, density, False)
+    model.firstStep = False
+    started = time.perf_counter()
+    model.generateMines()
+    return time.perf_counter() - started
+
+def benchOpenCell(model, size, density):
+    """
+    Открывает все безопасные ячейки поля: при малой плотности
+    время почти целиком уходит на каскады открытия.
+    """
+    prepareBoard(model, size, density)
+    started = time.perf_counter()
+    openAllSafeCells(model)
+    return time.perf_counter() - started
+
+def benchOpenCascade(model, size, density):
+    """
+    Один каскад на все поле: ход в пустую ячейку поля с одной миной.
+    Плотность не используется.
+    """
+    prepareSingleMine(model, size)
+    started = time.perf_counter()
+    model.openCell(size - 1, size - 1, False)
+    return time.perf_counter() - started
+
+def benchOpenClearNeighbours(model, size, density):
+    """
+    Аккорд на каждой ячейке полностью открытого поля с флажками на минах.
+    """
+    prepareBoard(model, size, density)
+    openAllSafeCells(model)
+    for row in range(model.rowCount):
+        for column in range(model.columnCount):
+            if model.getCell(row, column).mined:
+                model.nextCellMark(row, column)
+    started = time.perf_counter()
+    for row in range(model.rowCount):
+        for column in range(model.columnCount):
+            model.openClearNeighbours(row, column)
+    return time.perf_counter() - started
+
+def benchIsWin(model, size, density):
+    prepareBoard(model, size, density)
+    started = time.perf_counter()
+    for i in range(1000):
+        model.isWin()
+    return time.perf_counter() - started
+
+def benchGetCellNeighbours(model, size, density):
+    prepareBoard(model, size, density)
+    started = time.perf_counter()
+    for row in range(model.rowCount):
+        for column in range(model.columnCount):
+            model.getCellNeighbours(row, column)
+    return time.perf_counter() - started
+
+def benchMetrics(model, size, density):
+    prepareBoard(model, size, density)
+    started = time.perf_counter()
+    model.getMetrics()
+    return time.perf_counter() - started
+
+BENCHMARKS = {
+    'startGame': benchStartGame,
+    'generateMines': benchGenerateMines,
+    'openCell': benchOpenCell,
+    'openCascade': benchOpenCascade,
+    'openClearNeighbours': benchOpenClearNeighbours,
+    'isWin': benchIsWin,
+    'getCellNeighbours': benchGetCellNeighbours,
+    'metrics': benchMetrics,
+}
+
+# Замеры, не зависящие от плотности, выполняются один раз с плотностью 0.
+BENCH_DENSITIES = {
+    'openCascade': (0,),
+}
+
+def measure(bench, model, size, density, minTime = MIN_TIME):
+    """
+    Повторяет замер bench, пока суммарное время не достигнет minTime
+    (но не дольше MAX_WALL_TIME вместе с подготовкой поля),
+    и возвращает среднее время одного повторения.
+    """
+    deadline = time.perf_counter() + MAX_WALL_TIME
+    total = 0
+    number = 0
+    while total < minTime and (not number or time.perf_counter() < deadline):
+        total += bench(model, size, density)
+        number += 1
+    return total / number
+
+def run(engines = tuple(ENGINES), benchmarks = tuple(BENCHMARKS), repeat = 5, sizes = None,
+        minTime = MIN_TIME):
+    """
+    Выполняет замеры и возвращает словарь {имя случая: секунды},
+    где время - минимум из repeat замеров по minTime секунд.
+    """
+    results = {}
+    for engine in engines:
+        modelClass, engineSizes = ENGINES[engine]
+        model = modelClass()
+        for name in benchmarks:
+            for size in sizes or engineSizes + EXTRA_SIZES.get((engine, name), ()):
+                for density in BENCH_DENSITIES.get(name, DENSITIES):
+                    key = '%s/%dx%d/%.3f/%s' % (engine, size, size, density, name)
+                    results[key] = min(
+                            measure(BENCHMARKS[name], model, size, density, minTime)
+                            for i in range(repeat)
+                    )
+    return results
+
+def compare(results, baseline, tolerance, noiseFloor = NOISE_FLOOR):
+    """
+    Возвращает список регрессий: случаев, которые стали медленнее
+    эталона более чем на долю tolerance и более чем на noiseFloor секунд.
+    """
+    regressions = []
+    for key, seconds in sorted(results.items()):
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        if seconds > before * (1 + tolerance) and seconds - before > noiseFloor:
+            regressions.append((key, before, seconds))
+    return regressions
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description = 'Minesweeper model benchmarks.')
+    parser.add_argument('--engine', action = 'append', choices = sorted(ENGINES),
+            help = 'engine to benchmark (default: all)')
+    parser.add_argument('--bench', action = 'append', choices = sorted(BENCHMARKS),
+            help = 'benchmark to run (default: all)')
+    parser.add_argument('--sizes', type = int, nargs = '+', help = 'board sizes (default: per engine)')
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--min-time', type = float, default = MIN_TIME,
+            help = 'least total seconds per measurement (default: %s)' % MIN_TIME)
+    parser.add_argument('-o', '--output', help = 'write results as JSON to this file')
+    parser.add_argument('--baseline', help = 'JSON results to compare against')
+    parser.add_argument('--tolerance', type = float, default = 0.25,
+            help = 'allowed slowdown against the baseline (default: 0.25)')
+    parser.add_argument('--noise-floor', type = float, default = NOISE_FLOOR,
+            help = 'ignore slowdowns below this many seconds (default: %s)' % NOISE_FLOOR)
+    args = parser.parse_args(argv[1:])
+
+    results = run(args.engine or tuple(ENGINES), args.bench or tuple(BENCHMARKS), args.repeat, args.sizes,
+            args.min_time)
+    for key, seconds in sorted(results.items()):
+        print('%-50s %12.3f ms' % (key, seconds * 1000))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'seed': SEED,
+                'results': results,
+            }, f, indent = 2, sort_keys = True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance, args.noise_floor)
+        for key, before, after in regressions:
+            print('REGRESSION %s: %.3f ms -> %.3f ms (%+.0f%%)' % (
+                    key, before * 1000, after * 1000, (after / before - 1) * 100))
+        if regressions:
+            return 1
+        print('no regressions against %s' % args.baseline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
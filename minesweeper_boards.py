@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Массовая генерация полей Сапера с отбором по сложности.
+Поле задается зерном и ячейкой первого хода (как в minesweeper_noguess),
+сложность измеряется показателями BoardMetrics модели: 3BV, числом
+пустых областей и изолированных цифр. Поля можно отфильтровать
+по диапазону 3BV и разложить по корзинам заданной ширины.
+"""
+
+import sys
+import json
+import random
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import MinesweeperArrayModel
+
+# seed - зерно для startGame, startCell - адрес (row, column) первого хода.
+Board = namedtuple('Board', 'rowCount columnCount mineCount seed startCell metrics')
+
+def generateBoard(model, rowCount, columnCount, mineCount, seed, startCell = None):
+    """
+    Расставляет мины первым ходом в startCell (по умолчанию - в центр поля)
+    и возвращает Board с показателями сложности.
+    """
+    model.startGame(rowCount, columnCount, mineCount, seed)
+    if startCell is None:
+        startCell = (model.rowCount // 2, model.columnCount // 2)
+    model.openCell(*startCell, collect = False)
+    return Board(model.rowCount, model.columnCount, model.mineCount, seed, startCell, model.getMetrics())
+
+def generateBoards(rowCount, columnCount, mineCount, seeds, minBv3 = None, maxBv3 = None):
+    """
+    Генерирует поля с зернами seeds и возвращает список тех,
+    у которых 3BV лежит в диапазоне [minBv3, maxBv3].
+    """
+    model = MinesweeperArrayModel()
+    boards = []
+    for seed in seeds:
+        board = generateBoard(model, rowCount, columnCount, mineCount, seed)
+        bv3 = board.metrics.bv3
+        if (minBv3 is None or bv3 >= minBv3) and (maxBv3 is None or bv3 <= maxBv3):
+            boards.append(board)
+    return boards
+
+def bucketBoards(boards, bucketSize):
+    """
+    Раскладывает поля по корзинам ширины bucketSize по значению 3BV.
+    Возвращает словарь {нижняя граница корзины: список полей}.
+    """
+    buckets = {}
+    for board in boards:
+        buckets.setdefault(board.metrics.bv3 // bucketSize * bucketSize, []).append(board)
+    return buckets
+
+def run(count, rowCount, columnCount, mineCount, seed = 0, minBv3 = None, maxBv3 = None,
+        workers = None, batch = 256):
+    """
+    Генерирует count полей в пуле из workers процессов
+    (workers = 0 - в текущем процессе) и возвращает отобранные поля.
+    """
+    rng = random.Random(seed)
+    seeds = [rng.randrange(2 ** 32) for i in range(count)]
+    batches = [seeds[i:i + batch] for i in range(0, count, batch)]
+    if workers == 0:
+        results = [generateBoards(rowCount, columnCount, mineCount, seeds, minBv3, maxBv3) for seeds in batches]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [
+                    executor.submit(generateBoards, rowCount, columnCount, mineCount, seeds, minBv3, maxBv3)
+                    for seeds in batches
+            ]
+            results = [future.result() for future in futures]
+    return [board for boards in results for board in boards]
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description = 'Bulk minesweeper board generation by difficulty.')
+    parser.add_argument('-n', '--boards', type = int, default = 10000)
+    parser.add_argument('--rows', type = int, default = 16)
+    parser.add_argument('--columns', type = int, default = 30)
+    parser.add_argument('--mines', type = int, default = 99)
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--min-bv3', type = int, help = 'keep boards with at least this 3BV')
+    parser.add_argument('--max-bv3', type = int, help = 'keep boards with at most this 3BV')
+    parser.add_argument('--bucket', type = int, default = 10, help = '3BV bucket width (default: 10)')
+    parser.add_argument('--workers', type = int, default = None,
+            help = 'process count, 0 runs in the current process')
+    parser.add_argument('-o', '--output', help = 'write kept boards as JSON lines to this file')
+    args = parser.parse_args(argv[1:])
+
+    boards = run(args.boards, args.rows, args.columns, args.mines, args.seed,
+            args.min_bv3, args.max_bv3, args.workers)
+    buckets = bucketBoards(boards, args.bucket)
+    print('kept %d of %d boards' % (len(boards), args.boards))
+    for lower, bucket in sorted(buckets.items()):
+        print('3BV %4d-%-4d %6d' % (lower, lower + args.bucket - 1, len(bucket)))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            for board in boards:
+                record = board._asdict()
+                record['metrics'] = board.metrics._asdict()
+                f.write(json.dumps(record) + '\n')
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+"Бесконечное" поле для Сапера.
+Поле не имеет размеров: оно разбито на квадратные блоки (chunks),
+мины в каждом блоке выводятся из зерна игры и координат блока.
+Блок материализуется, только когда в нем меняется состояние ячейки,
+поэтому память пропорциональна исследованной области, а не полю.
+Мины нетронутых блоков, нужные для подсчета соседей, хранятся
+в LRU-кэше и вытесняются из него - их всегда можно вывести заново.
+"""
+
+import sys
+import random
+from collections import deque, OrderedDict
+
+from minesweeper import STATE_CLOSED, STATE_OPENED, STATE_FLAGGED, STATE_NAMES, NEXT_MARK, makeRandom
+
+CHUNK_SIZE = 32
+CACHED_CHUNK_COUNT = 1024
+# Наибольшее число новых блоков, которые материализует один каскад открытия.
+MAX_CASCADE_CHUNKS = 1024
+
+# Пределы плотности мин совпадают с пределами MinesweeperModel (1/8 - 6/8).
+# При плотности не ниже 1/8 область без мин конечна с вероятностью 1,
+# но ее размер ничем не ограничен, поэтому каскад открытия, кроме того,
+# останавливается после MAX_CASCADE_CHUNKS новых блоков (см. openZeroArea).
+MIN_MINE_DENSITY = 1 / 8
+MAX_MINE_DENSITY = 6 / 8
+
+class MinesweeperChunk:
+    """
+    Материализованный блок поля: мины и состояния его ячеек.
+    """
+    __slots__ = ('mines', 'states')
+
+    def __init__(self, mines):
+        self.mines = mines
+        self.states = bytearray(len(mines))
+
+
+class MinesweeperChunkedCell:
+    """
+    Легковесное представление ячейки модели MinesweeperChunkedModel.
+    """
+    __slots__ = ('model', 'row', 'column')
+
+    def __init__(self, model, row, column):
+        self.model = model
+        self.row = row
+        self.column = column
+
+    @property
+    def state(self):
+        return STATE_NAMES[self.model.getState(self.row, self.column)]
+
+    @property
+    def mined(self):
+        return self.model.isMined(self.row, self.column)
+
+    @property
+    def counter(self):
+        return self.model.countMinesAroundCell(self.row, self.column)
+
+
+class MinesweeperChunkedModel:
+    """
+    Класс модели игры на неограниченном поле.
+    Интерфейс открытия и пометки ячеек совпадает с MinesweeperModel,
+    координаты ячеек могут быть любыми целыми числами, в том числе
+    отрицательными. Выиграть на таком поле нельзя - можно только
+    исследовать его, пока не будет открыта мина.
+    """
+    # Учет изменившихся ячеек включается trackDirtyCells.
+    dirtyTracking = False
+
+    def __init__(self):
+        self.startGame()
+
+    def startGame(self, mineDensity = 0.15, seed = None, chunkSize = CHUNK_SIZE,
+            cachedChunkCount = CACHED_CHUNK_COUNT, maxCascadeChunks = MAX_CASCADE_CHUNKS):
+        """
+        Начинает новую игру с заданной плотностью мин.
+        seed (число или random.Random) задает расположение мин во всех блоках.
+        """
+        self.mineDensity = min(max(mineDensity, MIN_MINE_DENSITY), MAX_MINE_DENSITY)
+        self.seed, rng = makeRandom(seed)
+        if self.seed is None:
+            self.seed = rng.randrange(2 ** 32)
+        self.chunkSize = chunkSize
+        self.cachedChunkCount = cachedChunkCount
+        self.maxCascadeChunks = maxCascadeChunks
+        self.chunkMineCount = round(chunkSize * chunkSize * self.mineDensity)
+
+        self.firstStep = True
+        self.gameOver = False
+        # Первая открытая ячейка никогда не бывает заминирована.
+        self.safeCell = None
+        # Адреса изменившихся ячеек (см. popDirtyCells) или None,
+        # если учет не включен.
+        self.dirtyCells = set() if self.dirtyTracking else None
+        # Материализованные (тронутые) блоки - не вытесняются.
+        self.chunks = {}
+        # Мины нетронутых блоков в порядке последнего использования.
+        self.mineCache = OrderedDict()
+
+    def trackDirtyCells(self, enabled = True):
+        """
+        Включает или выключает учет изменившихся ячеек для popDirtyCells.
+        """
+        self.dirtyTracking = enabled
+        self.dirtyCells = set() if enabled else None
+
+    def getChunkMines(self, chunkRow, chunkColumn):
+        """
+        Возвращает массив мин блока, выводя его из зерна при необходимости.
+        """
+        key = (chunkRow, chunkColumn)
+        chunk = self.chunks.get(key)
+        if chunk:
+            return chunk.mines
+        mines = self.mineCache.get(key)
+        if mines is not None:
+            self.mineCache.move_to_end(key)
+            return mines
+
+        rng = random.Random('%d:%d:%d' % (self.seed, chunkRow, chunkColumn))
+        mines = bytearray(self.chunkSize * self.chunkSize)
+        for index in rng.sample(range(len(mines)), self.chunkMineCount):
+            mines[index] = 1
+        self.mineCache[key] = mines
+        if len(self.mineCache) > self.cachedChunkCount:
+            self.mineCache.popitem(last = False)
+        return mines
+
+    def getChunk(self, row, column):
+        """
+        Возвращает материализованный блок, содержащий ячейку (row;column).
+        """
+        key = (row // self.chunkSize, column // self.chunkSize)
+        chunk = self.chunks.get(key)
+        if not chunk:
+            chunk = MinesweeperChunk(self.getChunkMines(*key))
+            self.mineCache.pop(key, None)
+            self.chunks[key] = chunk
+        return chunk
+
+    def getIndex(self, row, column):
+        """
+        Возвращает индекс ячейки внутри ее блока.
+        """
+        return (row % self.chunkSize) * self.chunkSize + column % self.chunkSize
+
+    def isMined(self, row, column):
+        if (row, column) == self.safeCell:
+            return False
+        mines = self.getChunkMines(row // self.chunkSize, column // self.chunkSize)
+        return bool(mines[self.getIndex(row, column)])
+
+    def getState(self, row, column):
+        chunk = self.chunks.get((row // self.chunkSize, column // self.chunkSize))
+        if not chunk:
+            return STATE_CLOSED
+        return chunk.states[self.getIndex(row, column)]
+
+    def setState(self, row, column, state):
+        self.getChunk(row, column).states[self.getIndex(row, column)] = state
+        if self.dirtyCells is not None:
+            self.dirtyCells.add((row, column))
+
+    def getCell(self, row, column):
+        """
+        Возвращает представление ячейки по адресу row : column.
+        """
+        return MinesweeperChunkedCell(self, row, column)
+
+    def getNeighbourAddresses(self, row, column):
+        """
+        Возвращает список адресов соседних ячеек.
+        """
+        return [
+                (r, c)
+                for r in range(row - 1, row + 2)
+                for c in range(column - 1, column + 2)
+                if r != row or c != column
+        ]
+
+    def getCellNeighbours(self, row, column):
+        """
+        Возвращает список соседних ячеек.
+        """
+        return [MinesweeperChunkedCell(self, r, c) for r, c in self.getNeighbourAddresses(row, column)]
+
+    def countMinesAroundCell(self, row, column):
+        """
+        Метод подсчета заминированных ячеек вокруг данной.
+        """
+        return sum(1 for r, c in self.getNeighbourAddresses(row, column) if self.isMined(r, c))
+
+    def countFlaggedNeighbours(self, row, column):
+        """
+        Метод возращает количество соседних полей помеченных флажком.
+        """
+        return sum(
+                1 for r, c in self.getNeighbourAddresses(row, column)
+                if self.getState(r, c) == STATE_FLAGGED
+        )
+
+    def isWin(self):
+        """
+        На неограниченном поле победа невозможна.
+        """
+        return False
+
+    def isGameOver(self):
+        """
+        Возращает значение self.gameOver, которое устанавливается в истину,
+        в случае поражения.
+        """
+        return self.gameOver
+
+    def openCell(self, row, column, collect = True):
+        """
+        Метод открытия ячеек.
+        Если открываемая ячейка заминирована - игра окончена.
+        Если вокруг ячейки нет мин, то выполняется открытие соседних ячеек.
+        Ячейки, помеченные флажком, не открываются.
+        Возвращает список адресов (row, column) открытых ячеек;
+        при collect = False список не строится и возвращается None.
+        """
+        opened = [] if collect else None
+        state = self.getState(row, column)
+        if state == STATE_FLAGGED:
+            return opened
+
+        if self.firstStep:
+            self.firstStep = False
+            self.safeCell = (row, column)
+
+        if state != STATE_OPENED:
+            self.setState(row, column, STATE_OPENED)
+            if collect:
+                opened.append((row, column))
+            if self.isMined(row, column):
+                self.gameOver = True
+                return opened
+
+        if self.countMinesAroundCell(row, column) == 0:
+            self.openZeroArea(row, column, opened)
+        return opened
+
+    def openZeroArea(self, row, column, opened = None):
+        """
+        Открывает область вокруг ячейки с нулевым счетчиком.
+        Блоки материализуются по мере того, как каскад до них доходит.
+        Когда материализовано maxCascadeChunks новых блоков, каскад
+        останавливается на их границе: ячейки дальше остаются закрытыми
+        и открываются следующими ходами.
+        Адреса открытых ячеек дописываются в список opened, если он задан.
+        """
+        chunkSize = self.chunkSize
+        created = 0
+        queue = deque([(row, column)])
+        while queue:
+            row, column = queue.popleft()
+            for r, c in self.getNeighbourAddresses(row, column):
+                if self.getState(r, c) == STATE_CLOSED:
+                    if (r // chunkSize, c // chunkSize) not in self.chunks:
+                        if created >= self.maxCascadeChunks:
+                            continue
+                        created += 1
+                    self.setState(r, c, STATE_OPENED)
+                    if opened is not None:
+                        opened.append((r, c))
+                    if self.countMinesAroundCell(r, c) == 0:
+                        queue.append((r, c))
+
+    def openNeighbours(self, row, column, collect = True):
+        """
+        Метод открытия соседних полей.
+        Поля вокруг ячейки с адресом (row;column) открываются, и если
+        среди них есть заминированное поле не помеченное флажком - игра окончена.
+        Возвращает список адресов (row, column) открытых ячеек
+        (None при collect = False).
+        """
+        opened = [] if collect else None
+        for r, c in self.getNeighbourAddresses(row, column):
+            if self.getState(r, c) == STATE_CLOSED:
+                cells = self.openCell(r, c, collect)
+                if collect:
+                    opened.extend(cells)
+            if self.isMined(r, c) and self.getState(r, c) != STATE_FLAGGED:
+                self.gameOver = True
+                break
+        return opened
+
+    def openClearNeighbours(self, row, column, collect = True):
+        """
+        Метод открывает ячейки вокруг поля (row;column), если
+        число мин вокруг данного поля равно числу полей помеченных флажком.
+        Возвращает список адресов (row, column) открытых ячеек
+        (None при collect = False).
+        """
+        if self.countMinesAroundCell(row, column) == self.countFlaggedNeighbours(row, column):
+            return self.openNeighbours(row, column, collect)
+        return [] if collect else None
+
+    def nextCellMark(self, row, column):
+        """
+        Циклически меняет метку поля. Открытые ячейки не меняются.
+        """
+        state = self.getState(row, column)
+        if state == STATE_OPENED:
+            return
+        self.setState(row, column, NEXT_MARK[state])
+
+    def popDirtyCells(self):
+        """
+        Возвращает список адресов (row, column) ячеек, изменившихся
+        с момента предыдущего вызова, и очищает учет.
+        Без trackDirtyCells список всегда пуст.
+        """
+        if not self.dirtyCells:
+            return []
+        dirtyCells = self.dirtyCells
+        self.dirtyCells = set()
+        return list(dirtyCells)
+
+def test(argv=sys.argv):
+    model = MinesweeperChunkedModel()
+    model.startGame(0.15, seed = 7)
+    opened = model.openCell(10 ** 9, -10 ** 9)
+    print('opened %d cells, %d chunks materialized, %d chunks cached' % (
+            len(opened), len(model.chunks), len(model.mineCache)))
+
+if __name__ == "__main__":
+    sys.exit(test())
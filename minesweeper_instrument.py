@@ -0,0 +1,284 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Инструментирование обработчиков событий Сапера.
+Функция instrument оборачивает методы контроллера, модели и
+представления и для каждого события (щелчка или новой игры)
+передает приемнику (sink) запись со временем события целиком,
+временем работы модели и представления, временем модальных
+диалогов, числом перенастроек виджетов поля (вызовов config и
+itemconfig) и числом перерисованных ячеек.
+Обертки ставятся как атрибуты экземпляров, поэтому без вызова
+instrument (или после uninstrument) накладных расходов нет вовсе.
+"""
+
+import sys
+import json
+import time
+import logging
+
+EVENT_METHODS = ('onLeftClick', 'onRightClick', 'onMiddleClick', 'startNewGame', 'processEvents', 'redraw')
+MODEL_METHODS = ('startGame', 'openCell', 'nextCellMark', 'openClearNeighbours', 'isWin')
+VIEW_METHODS = ('syncWithModel', 'createBoard')
+DIALOG_METHODS = ('showWinMessage', 'showGameOverMessage')
+# Вызовы drawCell считаются как перерисованные ячейки.
+REDRAW_METHODS = ('drawCell',)
+# Вызовы этих методов кнопок и холста поля считаются как перенастройки
+# виджетов: одна перерисованная ячейка холста - это две перенастройки.
+WIDGET_METHODS = ('config', 'configure', 'itemconfig', 'itemconfigure')
+
+class Probe:
+    """
+    Собирает замеры текущего события и передает их приемнику.
+    """
+    def __init__(self, sink):
+        self.sink = sink
+        self.event = None
+        self.depth = {'model': 0, 'view': 0, 'dialog': 0}
+
+    def wrapEvent(self, name, method):
+        """
+        Обертка обработчика события. Вложенные обработчики (например,
+        startNewGame после проигрыша) относятся к внешнему событию.
+        """
+        def wrapper(*args, **kwargs):
+            if self.event is not None:
+                return method(*args, **kwargs)
+            self.event = {
+                'event': name,
+                'model': 0.0,
+                'view': 0.0,
+                'dialog': 0.0,
+                'reconfigurations': 0,
+                'redrawnCells': 0,
+            }
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                event, self.event = self.event, None
+                event['total'] = time.perf_counter() - started
+                self.sink.record(event)
+        return wrapper
+
+    def wrapTimed(self, category, method):
+        """
+        Обертка, добавляющая время вызова к категории category.
+        Учитывается только внешний вызов: внутренние вызовы модели
+        (openNeighbours -> openCell) не считаются дважды.
+        """
+        def wrapper(*args, **kwargs):
+            if self.event is None or self.depth[category]:
+                return method(*args, **kwargs)
+            self.depth[category] += 1
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.depth[category] -= 1
+                self.event[category] += time.perf_counter() - started
+        return wrapper
+
+    def wrapCounter(self, field, method):
+        """
+        Обертка, увеличивающая на единицу поле field текущего события.
+        """
+        def wrapper(*args, **kwargs):
+            if self.event is not None:
+                self.event[field] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+
+def wrapMethods(target, names, wrap):
+    for name in names:
+        method = getattr(target, name, None)
+        if method is not None:
+            setattr(target, name, wrap(name, method))
+
+def getBoardWidgets(view):
+    """
+    Возвращает виджеты поля представления: кнопки ячеек и холст (рамку) поля.
+    """
+    widgets = [button for line in getattr(view, 'buttonsTable', ()) for button in line]
+    board = getattr(view, 'board', None)
+    if board is not None:
+        widgets.append(board)
+    return widgets
+
+def instrumentWidgets(view, probe):
+    """
+    Оборачивает методы перенастройки виджетов поля, еще не обернутые.
+    Вызывается при instrument и после каждого createBoard, который
+    может заменить виджеты; настройка только что созданных виджетов
+    внутри createBoard перенастройкой не считается.
+    """
+    for widget in getBoardWidgets(view):
+        if not any(name in vars(widget) for name in WIDGET_METHODS):
+            wrapMethods(widget, WIDGET_METHODS, lambda name, method: probe.wrapCounter('reconfigurations', method))
+
+def instrument(controller, sink):
+    """
+    Включает инструментирование контроллера, его модели и представления.
+    Возвращает объект Probe.
+    """
+    probe = Probe(sink)
+    wrapMethods(controller, EVENT_METHODS, probe.wrapEvent)
+    wrapMethods(controller.model, MODEL_METHODS, lambda name, method: probe.wrapTimed('model', method))
+    view = getattr(controller, 'view', None)
+    if view is not None:
+        wrapMethods(view, VIEW_METHODS, lambda name, method: probe.wrapTimed('view', method))
+        wrapMethods(view, DIALOG_METHODS, lambda name, method: probe.wrapTimed('dialog', method))
+        wrapMethods(view, REDRAW_METHODS, lambda name, method: probe.wrapCounter('redrawnCells', method))
+        instrumentWidgets(view, probe)
+        createBoard = getattr(view, 'createBoard', None)
+        if createBoard is not None:
+            def createBoardWrapper(*args, **kwargs):
+                try:
+                    return createBoard(*args, **kwargs)
+                finally:
+                    instrumentWidgets(view, probe)
+            view.createBoard = createBoardWrapper
+    return probe
+
+def uninstrument(controller):
+    """
+    Снимает обертки, поставленные instrument.
+    """
+    targets = [
+        (controller, EVENT_METHODS),
+        (controller.model, MODEL_METHODS),
+    ]
+    view = getattr(controller, 'view', None)
+    if view is not None:
+        targets.append((view, VIEW_METHODS + DIALOG_METHODS + REDRAW_METHODS))
+        targets.extend((widget, WIDGET_METHODS) for widget in getBoardWidgets(view))
+    for target, names in targets:
+        for name in names:
+            target.__dict__.pop(name, None)
+
+
+class HistogramSink:
+    """
+    Приемник, хранящий замеры в памяти и строящий по ним перцентили.
+    """
+    FIELDS = ('total', 'model', 'view', 'dialog', 'reconfigurations', 'redrawnCells')
+    COUNTERS = ('reconfigurations', 'redrawnCells')
+
+    def __init__(self):
+        self.records = {}
+
+    def record(self, event):
+        self.records.setdefault(event['event'], []).append(event)
+
+    def summary(self, percentiles = (0.5, 0.9, 0.99)):
+        """
+        Возвращает словарь {событие: {поле: {перцентиль: значение}}}.
+        """
+        result = {}
+        for name, events in self.records.items():
+            result[name] = {'count': len(events)}
+            for field in self.FIELDS:
+                values = sorted(event[field] for event in events)
+                result[name][field] = {
+                    p: values[min(len(values) - 1, int(p * len(values)))]
+                    for p in percentiles
+                }
+        return result
+
+    def report(self):
+        lines = []
+        for name, stats in sorted(self.summary().items()):
+            lines.append('%s (%d events)' % (name, stats['count']))
+            for field in self.FIELDS:
+                values = stats[field]
+                if field in self.COUNTERS:
+                    text = ', '.join('p%g %d' % (p * 100, v) for p, v in values.items())
+                else:
+                    text = ', '.join('p%g %.2f ms' % (p * 100, v * 1000) for p, v in values.items())
+                lines.append('    %-16s %s' % (field, text))
+        return '\n'.join(lines)
+
+
+class LogSink:
+    """
+    Приемник, пишущий каждое событие в журнал logging.
+    """
+    def __init__(self, logger = None, level = logging.DEBUG):
+        self.logger = logger or logging.getLogger('minesweeper.instrument')
+        self.level = level
+
+    def record(self, event):
+        self.logger.log(self.level,
+                '%(event)s: total %(total).6f s, model %(model).6f s, view %(view).6f s, '
+                'reconfigurations %(reconfigurations)d, redrawn cells %(redrawnCells)d', event)
+
+
+class FileSink:
+    """
+    Приемник, дописывающий события в файл по одной JSON-записи на строку.
+    """
+    def __init__(self, filename):
+        self.file = open(filename, 'a')
+
+    def record(self, event):
+        self.file.write(json.dumps(event) + '\n')
+
+    def close(self):
+        self.file.close()
+
+def test(argv=sys.argv):
+    from minesweeper import MinesweeperModel, MinesweeperController, MAX_ROW_COUNT, MAX_COLUMN_COUNT
+
+    class HeadlessBoard:
+        def itemconfig(self, item, **options):
+            pass
+
+    class HeadlessView:
+        maxRowCount = MAX_ROW_COUNT
+        maxColumnCount = MAX_COLUMN_COUNT
+
+        def __init__(self, model):
+            self.model = model
+            self.board = HeadlessBoard()
+            model.trackDirtyCells()
+        def getGameSettings(self):
+            return self.model.rowCount, self.model.columnCount, self.model.mineCount
+        def createBoard(self):
+            self.syncWithModel(True)
+        def syncWithModel(self, full = False):
+            cells = self.model.popDirtyCells()
+            if full or self.model.isGameOver():
+                cells = [(r, c) for r in range(self.model.rowCount) for c in range(self.model.columnCount)]
+            for row, column in cells:
+                self.drawCell(row, column)
+        def drawCell(self, row, column):
+            index = row * self.model.columnCount + column
+            self.board.itemconfig(2 * index)
+            self.board.itemconfig(2 * index + 1)
+        def blockCell(self, row, column, block = True):
+            pass
+        def showWinMessage(self):
+            pass
+        def showGameOverMessage(self):
+            pass
+        def after_idle(self, callback):
+            callback()
+        def after(self, delay, callback):
+            callback()
+
+    model = MinesweeperModel()
+    controller = MinesweeperController(model)
+    controller.setView(HeadlessView(model))
+    sink = HistogramSink()
+    instrument(controller, sink)
+    for i in range(200):
+        controller.onLeftClick(i % model.rowCount, (i * 7) % model.columnCount)
+        controller.onRightClick((i * 3) % model.rowCount, i % model.columnCount)
+    uninstrument(controller)
+    print(sink.report())
+    assert not vars(controller.view.board)
+
+if __name__ == "__main__":
+    sys.exit(test())
@@ -0,0 +1,102 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Генератор нагрузки для minesweeper_server.
+Открывает заданное число соединений, в каждом из которых клиент
+играет партии случайными ходами, и выводит число запросов в секунду
+и перцентили задержки ответа.
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    if not response.get('ok'):
+        raise RuntimeError(response.get('error'))
+    return response
+
+async def player(connect, rowCount, columnCount, mineCount, deadline, seed, latencies):
+    """
+    Играет партии до наступления deadline, записывая задержку каждого запроса.
+    """
+    rng = random.Random(seed)
+    reader, writer = await connect()
+    try:
+        while time.perf_counter() < deadline:
+            response = await request(reader, writer, {
+                'cmd': 'new',
+                'rows': rowCount,
+                'columns': columnCount,
+                'mines': mineCount,
+                'seed': rng.randrange(2 ** 32),
+            })
+            session = response['session']
+            closed = [(r, c) for r in range(response['rows']) for c in range(response['columns'])]
+            closedSet = set(closed)
+            over = False
+            while not over and closed and time.perf_counter() < deadline:
+                # Случайная закрытая ячейка: выбор с удалением перестановкой.
+                index = rng.randrange(len(closed))
+                closed[index], closed[-1] = closed[-1], closed[index]
+                row, column = closed.pop()
+                if (row, column) not in closedSet:
+                    continue
+                started = time.perf_counter()
+                response = await request(reader, writer,
+                        {'cmd': 'open', 'session': session, 'row': row, 'column': column})
+                latencies.append(time.perf_counter() - started)
+                for r, c, state, counter in response['changed']:
+                    closedSet.discard((r, c))
+                over = response['over'] or response['win']
+            await request(reader, writer, {'cmd': 'close', 'session': session})
+    finally:
+        writer.close()
+
+async def run(connect, clients, seconds, rowCount, columnCount, mineCount):
+    latencies = []
+    started = time.perf_counter()
+    deadline = started + seconds
+    await asyncio.gather(*[
+            player(connect, rowCount, columnCount, mineCount, deadline, seed, latencies)
+            for seed in range(clients)
+    ])
+    return latencies, time.perf_counter() - started
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description = 'Load generator for minesweeper_server.')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8765)
+    parser.add_argument('--unix', help = 'connect to this Unix socket instead of TCP')
+    parser.add_argument('-c', '--clients', type = int, default = 100)
+    parser.add_argument('-t', '--seconds', type = float, default = 10)
+    parser.add_argument('--rows', type = int, default = 16)
+    parser.add_argument('--columns', type = int, default = 30)
+    parser.add_argument('--mines', type = int, default = 99)
+    args = parser.parse_args(argv[1:])
+
+    if args.unix:
+        connect = lambda: asyncio.open_unix_connection(args.unix)
+    else:
+        connect = lambda: asyncio.open_connection(args.host, args.port)
+    latencies, elapsed = asyncio.run(run(connect, args.clients, args.seconds,
+            args.rows, args.columns, args.mines))
+    latencies.sort()
+    print('moves:        %d' % len(latencies))
+    print('moves/second: %.0f' % (len(latencies) / elapsed))
+    print('latency:      p50 %.2f ms, p99 %.2f ms, p99.9 %.2f ms, max %.2f ms' % (
+            percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000,
+            percentile(latencies, 0.999) * 1000, (latencies[-1] if latencies else 0) * 1000))
+
+if __name__ == "__main__":
+    sys.exit(main())
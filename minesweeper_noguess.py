@@ -0,0 +1,154 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Генерация полей Сапера, которые решаются без угадывания.
+Поле задается зерном: MinesweeperModel.startGame с этим зерном и первый
+ход в стартовую ячейку дают ровно то поле, которое проверил решатель,
+поэтому такие партии записываются в журнал и воспроизводятся как обычные.
+Проверка дорогая, поэтому BoardPool держит для каждого набора
+(rows, columns, mines) ограниченный запас готовых полей и пополняет
+его в фоне пулом процессов.
+"""
+
+import sys
+import random
+import logging
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import MinesweeperArrayModel
+from minesweeper_solver import MinesweeperSolver
+
+MAX_ATTEMPTS = 10000
+POOL_CAPACITY = 8
+# Число неудачных генераций подряд, после которого запас для этих
+# параметров больше не пополняется.
+MAX_FAILURES = 3
+
+logger = logging.getLogger('minesweeper.noguess')
+
+# seed - зерно для startGame, startCell - адрес (row, column) первого хода.
+NoGuessBoard = namedtuple('NoGuessBoard', 'rowCount columnCount mineCount seed startCell attempts')
+
+def isSolvable(model, startCell):
+    """
+    Делает первый ход в startCell и открывает ячейки, пока решатель
+    находит безопасные. Возвращает True, если открыто все поле.
+    """
+    solver = MinesweeperSolver(model)
+    solver.update(model.openCell(*startCell))
+    while not model.isGameOver() and not model.isWin():
+        hint = solver.getHint()
+        if hint is None:
+            return False
+        solver.update(model.openCell(*hint))
+    return model.isWin()
+
+def generateNoGuessBoard(rowCount, columnCount, mineCount, seed = None, maxAttempts = MAX_ATTEMPTS):
+    """
+    Подбирает зерно, при котором поле решается от первого хода
+    в центральную ячейку без угадывания. Кандидаты проверяются
+    детерминированным решателем MinesweeperSolver.
+    """
+    rng = random.Random(seed)
+    model = MinesweeperArrayModel()
+    for attempt in range(1, maxAttempts + 1):
+        boardSeed = rng.randrange(2 ** 32)
+        model.startGame(rowCount, columnCount, mineCount, boardSeed)
+        startCell = (model.rowCount // 2, model.columnCount // 2)
+        if isSolvable(model, startCell):
+            return NoGuessBoard(model.rowCount, model.columnCount, model.mineCount,
+                    boardSeed, startCell, attempt)
+    raise RuntimeError('No no-guess board found for %dx%d with %d mines in %d attempts' % (
+            rowCount, columnCount, mineCount, maxAttempts))
+
+
+class BoardPool:
+    """
+    Запас готовых полей без угадывания.
+    get никогда не генерирует поле сам: он возвращает поле из запаса
+    (или None, если запас пуст) и заказывает фоновое пополнение.
+    Если генерация для набора параметров раз за разом не удается,
+    пополнение для него прекращается.
+    """
+    def __init__(self, capacity = POOL_CAPACITY, workers = None, maxFailures = MAX_FAILURES):
+        self.capacity = capacity
+        self.maxFailures = maxFailures
+        self.executor = ProcessPoolExecutor(workers)
+        self.lock = threading.Lock()
+        self.boards = {}
+        self.inflight = {}
+        # Число неудачных генераций подряд для каждого набора параметров.
+        self.failures = {}
+
+    def refill(self, rowCount, columnCount, mineCount):
+        """
+        Заказывает фоновую генерацию полей до заполнения запаса.
+        """
+        key = (rowCount, columnCount, mineCount)
+        with self.lock:
+            if self.failures.get(key, 0) >= self.maxFailures:
+                return
+            ready = self.boards.setdefault(key, deque())
+            missing = max(self.capacity - len(ready) - self.inflight.get(key, 0), 0)
+            self.inflight[key] = self.inflight.get(key, 0) + missing
+        for i in range(missing):
+            future = self.executor.submit(generateNoGuessBoard, rowCount, columnCount, mineCount)
+            future.add_done_callback(lambda future, key = key: self.onBoardReady(key, future))
+
+    def onBoardReady(self, key, future):
+        with self.lock:
+            self.inflight[key] -= 1
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is None:
+                self.boards[key].append(future.result())
+                self.failures[key] = 0
+                return
+            self.failures[key] = self.failures.get(key, 0) + 1
+            failures = self.failures[key]
+        logger.warning('no-guess board generation for %dx%d/%d failed: %s', *key, error)
+        if failures == self.maxFailures:
+            logger.warning('giving up on no-guess boards for %dx%d/%d after %d failures', *key, failures)
+
+    def get(self, rowCount, columnCount, mineCount):
+        """
+        Возвращает готовое поле NoGuessBoard для заданных параметров
+        или None, если в запасе его нет. Не блокирует вызывающий поток.
+        """
+        key = (rowCount, columnCount, mineCount)
+        with self.lock:
+            ready = self.boards.get(key)
+            board = ready.popleft() if ready else None
+        self.refill(rowCount, columnCount, mineCount)
+        return board
+
+    def isExhausted(self, rowCount, columnCount, mineCount):
+        """
+        Возвращает True, если пополнение для этих параметров прекращено
+        после MAX_FAILURES неудачных генераций подряд.
+        """
+        with self.lock:
+            return self.failures.get((rowCount, columnCount, mineCount), 0) >= self.maxFailures
+
+    def close(self):
+        self.executor.shutdown(wait = False, cancel_futures = True)
+
+def test(argv=sys.argv):
+    import time
+    from minesweeper import MinesweeperModel
+
+    for settings in ((9, 9, 10), (16, 16, 40), (16, 30, 99)):
+        started = time.perf_counter()
+        board = generateNoGuessBoard(*settings, seed = 1)
+        elapsed = time.perf_counter() - started
+        model = MinesweeperModel()
+        model.startGame(board.rowCount, board.columnCount, board.mineCount, board.seed)
+        print('%dx%d/%d: %d attempts, %.3f s, replays as no-guess on MinesweeperModel: %s' % (
+                settings + (board.attempts, elapsed, isSolvable(model, board.startCell))))
+
+if __name__ == "__main__":
+    sys.exit(test())
@@ -0,0 +1,327 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Точный расчет вероятности мины для закрытых ячеек Сапера.
+Граница (закрытые ячейки рядом с открытыми числами) разбивается на
+независимые компоненты: ячейки связаны, если участвуют в ограничении
+одного числа. Каждая компонента перебирается отдельно, а результаты
+объединяются с весами C(U, M - k), где U - число закрытых ячеек
+вне границы, M - число оставшихся мин, k - число мин на границе.
+Веса считаются заново при каждом расчете как числа с плавающей точкой,
+отнесенные к наибольшему из них (см. binomialWeights).
+Перебор компоненты кэшируется по ее ограничениям, поэтому после хода
+пересчитываются только компоненты рядом с изменившимися ячейками.
+"""
+
+import sys
+import math
+
+from minesweeper_solver import MinesweeperSolver
+
+def binomialWeights(n, kMax):
+    """
+    Возвращает список весов w[k], пропорциональных C(n, k), для k от 0
+    до kMax (0 при k > n). Веса накапливаются в логарифмах по отношению
+    соседних коэффициентов C(n, k) / C(n, k - 1) = (n - k + 1) / k
+    и делятся на наибольший, поэтому на большом поле не появляются
+    огромные целые числа.
+    """
+    top = min(n, kMax)
+    logs = [0.0] * (top + 1)
+    for k in range(1, top + 1):
+        logs[k] = logs[k - 1] + math.log(n - k + 1) - math.log(k)
+    peak = max(logs)
+    return [math.exp(value - peak) for value in logs] + [0.0] * (kMax - top)
+
+def convolve(first, second, limit):
+    """
+    Свертка распределений {число мин: число вариантов} с отбрасыванием
+    вариантов, в которых мин больше limit.
+    """
+    result = {}
+    for i, a in first.items():
+        for j, b in second.items():
+            if i + j <= limit:
+                result[i + j] = result.get(i + j, 0) + a * b
+    return result
+
+def splitComponents(constraints):
+    """
+    Разбивает список ограничений (unknown, remaining) на компоненты
+    связности по общим ячейкам. Возвращает список списков ограничений.
+    """
+    byCell = {}
+    for index, (unknown, remaining) in enumerate(constraints):
+        for address in unknown:
+            byCell.setdefault(address, []).append(index)
+    visited = [False] * len(constraints)
+    components = []
+    for start in range(len(constraints)):
+        if visited[start]:
+            continue
+        visited[start] = True
+        stack = [start]
+        component = []
+        while stack:
+            index = stack.pop()
+            component.append(constraints[index])
+            for address in constraints[index][0]:
+                for other in byCell[address]:
+                    if not visited[other]:
+                        visited[other] = True
+                        stack.append(other)
+        components.append(component)
+    return components
+
+def enumerateComponent(constraints):
+    """
+    Перебирает расстановки мин в одной компоненте.
+    Ячейки, входящие в одни и те же ограничения, взаимозаменяемы,
+    поэтому перебирается не каждая ячейка, а число мин в группе таких
+    ячеек с весом C(size, m).
+    Возвращает пару (groups, solutions): groups - список кортежей адресов,
+    solutions - словарь {k: (ways, minedWays)}, где ways - число расстановок
+    с k минами, а minedWays[g] - число таких расстановок, в которых
+    заминирована конкретная ячейка группы g.
+    """
+    signatures = {}
+    for index, (unknown, remaining) in enumerate(constraints):
+        for address in unknown:
+            signatures.setdefault(address, []).append(index)
+    groupsBySignature = {}
+    for address, indexes in signatures.items():
+        groupsBySignature.setdefault(tuple(indexes), []).append(address)
+
+    # Группы упорядочиваются так, чтобы ограничения закрывались как можно
+    # раньше: тогда противоречия отсекаются на малой глубине перебора.
+    byConstraint = [[] for constraint in constraints]
+    for signature in groupsBySignature:
+        for index in signature:
+            byConstraint[index].append(signature)
+    order = []
+    seen = set()
+    for constraintGroups in byConstraint:
+        for signature in constraintGroups:
+            if signature not in seen:
+                seen.add(signature)
+                order.append(signature)
+
+    groups = [tuple(sorted(groupsBySignature[signature])) for signature in order]
+    sizes = [len(group) for group in groups]
+    need = [remaining for unknown, remaining in constraints]
+    free = [len(unknown) for unknown, remaining in constraints]
+    counts = [0] * len(groups)
+    solutions = {}
+
+    def search(position, mines, ways):
+        if position == len(groups):
+            known, minedWays = solutions.get(mines) or (0, [0] * len(groups))
+            solutions[mines] = (known + ways, [
+                    minedWays[g] + ways * counts[g] // sizes[g]
+                    for g in range(len(groups))
+            ])
+            return
+        signature = order[position]
+        size = sizes[position]
+        for index in signature:
+            free[index] -= size
+        for m in range(size + 1):
+            if all(0 <= need[index] - m <= free[index] for index in signature):
+                for index in signature:
+                    need[index] -= m
+                counts[position] = m
+                search(position + 1, mines + m, ways * math.comb(size, m))
+                for index in signature:
+                    need[index] += m
+        for index in signature:
+            free[index] += size
+
+    search(0, 0, 1)
+    return groups, solutions
+
+
+class MinesweeperProbability:
+    """
+    Калькулятор вероятностей.
+    Использует границу и выводы решателя MinesweeperSolver: заведомые мины
+    и безопасные ячейки в перебор не попадают. Решатель должен получать
+    все ходы через update.
+    """
+    def __init__(self, model, solver = None):
+        self.model = model
+        self.solver = solver or MinesweeperSolver(model)
+        # Результаты перебора компонент по ключу из их ограничений.
+        self.componentCache = {}
+
+    def getComponent(self, constraints):
+        key = frozenset((frozenset(unknown), remaining) for unknown, remaining in constraints)
+        result = self.componentCache.get(key)
+        if result is None:
+            result = enumerateComponent(constraints)
+        return key, result
+
+    def compute(self):
+        """
+        Возвращает пару (probabilities, otherProbability): словарь
+        {(row, column): вероятность} для ячеек границы и заведомых выводов
+        и вероятность мины для любой другой закрытой ячейки
+        (None, если таких ячеек нет).
+        """
+        solver = self.solver
+        probabilities = dict.fromkeys(solver.mineCells, 1.0)
+        probabilities.update(dict.fromkeys(solver.safeCells, 0.0))
+
+        constraints = []
+        for row, column in solver.frontier:
+            unknown, remaining = solver.getConstraint(row, column)
+            if unknown:
+                constraints.append((unknown, remaining))
+        components = []
+        cache = {}
+        for component in splitComponents(constraints):
+            key, result = self.getComponent(component)
+            cache[key] = result
+            components.append(result)
+        # В кэше остаются только компоненты, которые еще есть на поле.
+        self.componentCache = cache
+
+        frontierCount = sum(len(group) for groups, solutions in components for group in groups)
+        closedCount = self.model.mineCount + self.model.closedSafeCount
+        otherCount = closedCount - frontierCount - len(solver.mineCells) - len(solver.safeCells)
+        mineCount = self.model.mineCount - len(solver.mineCells)
+        if mineCount < 0:
+            return probabilities, None
+
+        # prefix[j] - свертка компонент до j, suffix[j] - начиная с j.
+        distributions = [
+                {k: ways for k, (ways, minedWays) in solutions.items()}
+                for groups, solutions in components
+        ]
+        prefix = [{0: 1}]
+        for distribution in distributions:
+            prefix.append(convolve(prefix[-1], distribution, mineCount))
+        suffix = [{0: 1}]
+        for distribution in reversed(distributions):
+            suffix.append(convolve(suffix[-1], distribution, mineCount))
+        suffix.reverse()
+
+        # weights[r] пропорционален числу расстановок r мин вне границы.
+        weights = binomialWeights(otherCount, mineCount)
+        total = sum(ways * weights[mineCount - t] for t, ways in prefix[-1].items())
+        if total == 0:
+            return probabilities, None
+
+        for j, (groups, solutions) in enumerate(components):
+            others = convolve(prefix[j], suffix[j + 1], mineCount)
+            mined = [0] * len(groups)
+            for k, (ways, minedWays) in solutions.items():
+                weight = sum(w * weights[mineCount - k - t] for t, w in others.items() if k + t <= mineCount)
+                if weight:
+                    for g in range(len(groups)):
+                        mined[g] += minedWays[g] * weight
+            for group, minedTotal in zip(groups, mined):
+                probability = minedTotal / total
+                for address in group:
+                    probabilities[address] = probability
+
+        otherProbability = None
+        if otherCount:
+            # C(U - 1, r - 1) = C(U, r) * r / U.
+            otherProbability = sum(
+                    ways * weights[mineCount - t] * (mineCount - t) / otherCount
+                    for t, ways in prefix[-1].items()
+            ) / total
+        return probabilities, otherProbability
+
+    def getProbabilities(self):
+        """
+        Возвращает словарь {(row, column): вероятность мины}
+        для всех закрытых ячеек поля.
+        """
+        probabilities, otherProbability = self.compute()
+        for row in range(self.model.rowCount):
+            for column in range(self.model.columnCount):
+                if (row, column) not in probabilities and self.model.getCell(row, column).state != 'opened':
+                    probabilities[(row, column)] = otherProbability
+        return probabilities
+
+    def getBestGuess(self):
+        """
+        Возвращает адрес закрытой ячейки с наименьшей вероятностью мины
+        или None, если закрытых ячеек нет. Среди ячеек вне границы
+        предпочитаются углы: в них больше шансов сразу получить пустую область.
+        """
+        probabilities, otherProbability = self.compute()
+        best = None
+        bestProbability = 2.0
+        for address, probability in probabilities.items():
+            if probability < bestProbability:
+                best, bestProbability = address, probability
+        if otherProbability is not None and otherProbability < bestProbability:
+            model = self.model
+            lastRow, lastColumn = model.rowCount - 1, model.columnCount - 1
+            corners = [(0, 0), (0, lastColumn), (lastRow, 0), (lastRow, lastColumn)]
+            cells = ((row, column) for row in range(model.rowCount) for column in range(model.columnCount))
+            for row, column in corners + list(cells):
+                if (row, column) not in probabilities and model.getCell(row, column).state != 'opened':
+                    return row, column
+        return best
+
+
+class ProbabilityPolicy:
+    """
+    Стратегия для minesweeper_runner: открывает безопасные ячейки,
+    найденные решателем, а при их отсутствии - ячейку с наименьшей
+    вероятностью мины.
+    """
+    def newGame(self, model):
+        self.calculator = MinesweeperProbability(model)
+
+    def observe(self, model, openedCells):
+        self.calculator.solver.update(openedCells)
+
+    def __call__(self, model, rng):
+        hint = self.calculator.solver.getHint()
+        if hint is None:
+            hint = self.calculator.getBestGuess()
+        return ('open',) + hint
+
+def test(argv=sys.argv):
+    import itertools
+    from minesweeper import MinesweeperModel
+
+    # Сравнение с полным перебором расстановок мин по всем закрытым ячейкам.
+    model = MinesweeperModel()
+    model.startGame(5, 6, 6, seed = 3)
+    calculator = MinesweeperProbability(model)
+    calculator.solver.update(model.openCell(0, 0))
+    probabilities = calculator.getProbabilities()
+    closed = sorted(probabilities)
+    opened = [
+            (row, column)
+            for row in range(model.rowCount)
+            for column in range(model.columnCount)
+            if model.getCell(row, column).state == 'opened'
+    ]
+    mined = dict.fromkeys(closed, 0)
+    total = 0
+    for mines in itertools.combinations(closed, model.mineCount):
+        mineSet = set(mines)
+        if all(model.getCell(r, c).counter == sum(
+                (n.row, n.column) in mineSet for n in model.getCellNeighbours(r, c)) for r, c in opened):
+            total += 1
+            for address in mines:
+                mined[address] += 1
+    error = max(abs(probabilities[address] - mined[address] / total) for address in closed)
+    print('closed cells: %d, max error against brute force: %.2e' % (len(closed), error))
+
+    import minesweeper_runner
+    for policy in ('solver', 'probability'):
+        stats = minesweeper_runner.run(200, policy = policy, rowCount = 16, columnCount = 30,
+                mineCount = 99, workers = 0)
+        print('%-12s win rate on 16x30/99: %.1f%%, %.1f games/s' % (
+                policy, stats['win_rate'] * 100, stats['games_per_second']))
+
+if __name__ == "__main__":
+    sys.exit(test())
@@ -0,0 +1,123 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Журнал ходов и воспроизведение партий Сапера.
+Контроллер записывает в журнал MoveLog каждое действие игрока
+и параметры каждой новой игры вместе с зерном генерации мин.
+Функция replay повторяет журнал на модели без графического
+интерфейса с максимальной скоростью: это позволяет точно
+воспроизводить ошибки и использовать реальные партии как нагрузку.
+"""
+
+import sys
+import time
+from array import array
+
+from minesweeper import MinesweeperModel, MinesweeperArrayModel
+
+MAGIC = b'MSWL'
+
+# Коды событий журнала.
+EVENT_NEW_GAME = 0
+EVENT_OPEN = 1
+EVENT_MARK = 2
+EVENT_CHORD = 3
+
+ACTIONS = {
+    'open': EVENT_OPEN,
+    'mark': EVENT_MARK,
+    'chord': EVENT_CHORD,
+}
+
+class MoveLog:
+    """
+    Журнал ходов.
+    События хранятся подряд в одном массиве array('q'):
+        EVENT_NEW_GAME, rowCount, columnCount, mineCount, seed
+        EVENT_OPEN | EVENT_MARK | EVENT_CHORD, row, column
+    """
+    def __init__(self):
+        self.events = array('q')
+
+    def recordNewGame(self, rowCount, columnCount, mineCount, seed):
+        if not isinstance(seed, int):
+            raise ValueError('Only games with an integer seed can be recorded!')
+        self.events.extend((EVENT_NEW_GAME, rowCount, columnCount, mineCount, seed))
+
+    def recordMove(self, action, row, column):
+        self.events.extend((ACTIONS[action], row, column))
+
+    def __iter__(self):
+        """
+        Перебирает события в виде кортежей (code, *arguments).
+        """
+        events = self.events
+        position = 0
+        while position < len(events):
+            if events[position] == EVENT_NEW_GAME:
+                yield tuple(events[position:position + 5])
+                position += 5
+            else:
+                yield tuple(events[position:position + 3])
+                position += 3
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(MAGIC)
+            f.write(self.events.tobytes())
+
+    @classmethod
+    def load(cls, filename):
+        log = cls()
+        with open(filename, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('Not a minesweeper move log!')
+            log.events.frombytes(f.read())
+        return log
+
+def replay(log, model = None, onEvent = None):
+    """
+    Повторяет журнал log на модели model (по умолчанию MinesweeperModel)
+    без отрисовки. Если задана функция onEvent(model, event), она
+    вызывается после каждого события, например для проверок.
+    Возвращает словарь со статистикой прогона.
+    """
+    if model is None:
+        model = MinesweeperModel()
+    stats = {'games': 0, 'moves': 0, 'wins': 0, 'losses': 0}
+    started = time.perf_counter()
+    for event in log:
+        code = event[0]
+        if code == EVENT_NEW_GAME:
+            model.startGame(*event[1:])
+            stats['games'] += 1
+        else:
+            if code == EVENT_OPEN:
+                model.openCell(event[1], event[2], False)
+            elif code == EVENT_MARK:
+                model.nextCellMark(event[1], event[2])
+            elif code == EVENT_CHORD:
+                model.openClearNeighbours(event[1], event[2], False)
+            stats['moves'] += 1
+            if model.isWin():
+                stats['wins'] += 1
+            elif model.isGameOver():
+                stats['losses'] += 1
+        if onEvent:
+            onEvent(model, event)
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+def main(argv=sys.argv):
+    if len(argv) < 2:
+        print('usage: %s LOG [--array]' % argv[0])
+        return 1
+    model = MinesweeperArrayModel() if '--array' in argv else MinesweeperModel()
+    stats = replay(MoveLog.load(argv[1]), model)
+    print('games: %(games)d, moves: %(moves)d, wins: %(wins)d, losses: %(losses)d' % stats)
+    if stats['seconds']:
+        print('%.0f moves/second' % (stats['moves'] / stats['seconds']))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Прогон партий Сапера без графического интерфейса.
+Партии разыгрываются стратегией (policy) на модели MinesweeperModel
+или MinesweeperArrayModel и распределяются по пулу процессов.
+По итогам выводятся число партий в секунду, доля побед
+и перцентили времени обработки хода моделью.
+
+Стратегия - это функция policy(model, rng), которая возвращает
+ход в виде кортежа (action, row, column), где action - одно из
+'open', 'mark', 'chord'. Стратегия может быть классом; тогда
+у его экземпляра вызываются необязательные методы newGame(model)
+в начале партии и observe(model, openedCells) после каждого хода.
+"""
+
+import sys
+import time
+import random
+import argparse
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import MinesweeperModel, MinesweeperArrayModel
+from minesweeper_solver import SolverPolicy
+from minesweeper_probability import ProbabilityPolicy
+
+ENGINES = {
+    'object': MinesweeperModel,
+    'array': MinesweeperArrayModel,
+}
+
+def randomPolicy(model, rng):
+    """
+    Простейшая стратегия - открыть случайную закрытую ячейку.
+    """
+    for attempt in range(64):
+        row = rng.randrange(model.rowCount)
+        column = rng.randrange(model.columnCount)
+        if model.getCell(row, column).state == 'closed':
+            return 'open', row, column
+    closed = [
+            (row, column)
+            for row in range(model.rowCount)
+            for column in range(model.columnCount)
+            if model.getCell(row, column).state == 'closed'
+    ]
+    return ('open',) + rng.choice(closed)
+
+POLICIES = {
+    'random': randomPolicy,
+    'solver': SolverPolicy,
+    'probability': ProbabilityPolicy,
+}
+
+def getPolicy(name):
+    """
+    Возвращает стратегию по имени из POLICIES или по пути вида 'module:function'.
+    """
+    if name in POLICIES:
+        policy = POLICIES[name]
+    else:
+        moduleName, _, functionName = name.partition(':')
+        policy = getattr(importlib.import_module(moduleName), functionName)
+    if isinstance(policy, type):
+        policy = policy()
+    return policy
+
+def playGame(model, policy, rowCount, columnCount, mineCount, seed):
+    """
+    Разыгрывает одну партию и возвращает пару (won, latencies),
+    где latencies - список времени обработки каждого хода моделью в секундах.
+    """
+    model.startGame(rowCount, columnCount, mineCount, seed)
+    rng = random.Random(seed)
+    actions = {
+        'open': model.openCell,
+        'mark': model.nextCellMark,
+        'chord': model.openClearNeighbours,
+    }
+    newGame = getattr(policy, 'newGame', None)
+    observe = getattr(policy, 'observe', None)
+    if newGame:
+        newGame(model)
+    latencies = []
+    # Защита от стратегий, которые бесконечно переставляют метки.
+    maxMoves = 3 * model.rowCount * model.columnCount
+    while not model.isWin() and not model.isGameOver() and len(latencies) < maxMoves:
+        action, row, column = policy(model, rng)
+        started = time.perf_counter()
+        openedCells = actions[action](row, column)
+        latencies.append(time.perf_counter() - started)
+        if observe:
+            observe(model, openedCells or [])
+    return model.isWin(), latencies
+
+def playGames(engine, policyName, rowCount, columnCount, mineCount, seeds):
+    """
+    Разыгрывает партии с заданными зернами в одном процессе.
+    Возвращает пару (wins, latencies) по всем партиям.
+    """
+    model = ENGINES[engine]()
+    policy = getPolicy(policyName)
+    wins = 0
+    latencies = []
+    for seed in seeds:
+        won, gameLatencies = playGame(model, policy, rowCount, columnCount, mineCount, seed)
+        wins += won
+        latencies.extend(gameLatencies)
+    return wins, latencies
+
+def percentile(values, fraction):
+    """
+    Возвращает перцентиль отсортированного списка values.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def run(games, engine = 'object', policy = 'random', rowCount = 15, columnCount = 15,
+        mineCount = 28, workers = None, seed = 0, batch = 16):
+    """
+    Разыгрывает games партий в пуле из workers процессов
+    (workers = 0 - в текущем процессе) и возвращает словарь со статистикой.
+    """
+    seeds = list(range(seed, seed + games))
+    batches = [seeds[i:i + batch] for i in range(0, games, batch)]
+    started = time.perf_counter()
+    if workers == 0:
+        results = [
+                playGames(engine, policy, rowCount, columnCount, mineCount, seeds)
+                for seeds in batches
+        ]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [
+                    executor.submit(playGames, engine, policy, rowCount, columnCount, mineCount, seeds)
+                    for seeds in batches
+            ]
+            results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    wins = sum(result[0] for result in results)
+    latencies = sorted(latency for result in results for latency in result[1])
+    return {
+        'games': games,
+        'seconds': elapsed,
+        'games_per_second': games / elapsed if elapsed else 0.0,
+        'win_rate': wins / games if games else 0.0,
+        'moves': len(latencies),
+        'latency_p50': percentile(latencies, 0.50),
+        'latency_p90': percentile(latencies, 0.90),
+        'latency_p99': percentile(latencies, 0.99),
+        'latency_max': latencies[-1] if latencies else 0.0,
+    }
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description = 'Headless minesweeper simulation runner.')
+    parser.add_argument('-n', '--games', type = int, default = 1000)
+    parser.add_argument('--engine', choices = sorted(ENGINES), default = 'object')
+    parser.add_argument('--policy', default = 'random',
+            help = 'policy name (%s) or module:function' % ', '.join(sorted(POLICIES)))
+    parser.add_argument('--rows', type = int, default = 15)
+    parser.add_argument('--columns', type = int, default = 15)
+    parser.add_argument('--mines', type = int, default = 28)
+    parser.add_argument('--workers', type = int, default = None,
+            help = 'process count, 0 runs in the current process')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--batch', type = int, default = 16, help = 'games per pool task')
+    args = parser.parse_args(argv[1:])
+
+    stats = run(args.games, args.engine, args.policy, args.rows, args.columns,
+            args.mines, args.workers, args.seed, args.batch)
+    print('games:         %d' % stats['games'])
+    print('games/second:  %.1f' % stats['games_per_second'])
+    print('win rate:      %.2f%%' % (stats['win_rate'] * 100))
+    print('moves:         %d' % stats['moves'])
+    print('move latency:  p50 %.1f us, p90 %.1f us, p99 %.1f us, max %.1f us' % (
+            stats['latency_p50'] * 1e6, stats['latency_p90'] * 1e6,
+            stats['latency_p99'] * 1e6, stats['latency_max'] * 1e6))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Сохранение и загрузка состояния игры Сапер в компактном двоичном формате.
+
+Файл состоит из заголовка HEADER и байта на каждую ячейку:
+    бит 0     - ячейка заминирована;
+    биты 1-2  - код состояния (STATE_CLOSED и т.д.);
+    биты 4-7  - число мин вокруг ячейки.
+Файл открывается через mmap, а ячейки раскладываются по массивам
+MinesweeperArrayModel с помощью bytes.translate, без разбора
+каждой ячейки на уровне Python.
+"""
+
+import os
+import sys
+import mmap
+import struct
+
+from minesweeper import MinesweeperArrayModel
+
+MAGIC = b'MSWP'
+VERSION = 1
+
+# magic, version, flags, rowCount, columnCount, mineCount, closedSafeCount, seed
+HEADER = struct.Struct('<4sHHIIIIQ')
+
+FLAG_FIRST_STEP = 1
+FLAG_GAME_OVER = 2
+FLAG_SEED = 4
+
+MINE_TABLE = bytes(value & 1 for value in range(256))
+STATE_TABLE = bytes((value >> 1) & 3 for value in range(256))
+COUNTER_TABLE = bytes(value >> 4 for value in range(256))
+
+def packCells(model):
+    """
+    Возвращает байты ячеек модели в формате файла.
+    """
+    if isinstance(model, MinesweeperArrayModel):
+        # Битовые поля не пересекаются, поэтому байты можно собрать
+        # сложением больших целых без переносов между соседними ячейками.
+        cells = (int.from_bytes(model.mines, 'little')
+                + (int.from_bytes(model.states, 'little') << 1)
+                + (int.from_bytes(model.counters, 'little') << 4))
+        return cells.to_bytes(model.cellCount, 'little')
+
+    cells = bytearray()
+    for cellsRow in model.cellsTable:
+        for cell in cellsRow:
+            cells.append(cell.mined | (cell.stateCode << 1) | (cell.counter << 4))
+    return bytes(cells)
+
+def saveGame(model, filename):
+    """
+    Сохраняет состояние модели в файл filename.
+    Запись идет во временный файл, который затем атомарно
+    заменяет прежний, чтобы сбой не оставил испорченный снимок.
+    """
+    flags = 0
+    if model.firstStep:
+        flags |= FLAG_FIRST_STEP
+    if model.gameOver:
+        flags |= FLAG_GAME_OVER
+    seed = 0
+    if isinstance(model.seed, int) and 0 <= model.seed < 2 ** 64:
+        flags |= FLAG_SEED
+        seed = model.seed
+
+    header = HEADER.pack(MAGIC, VERSION, flags, model.rowCount, model.columnCount,
+            model.mineCount, model.closedSafeCount, seed)
+    temporary = filename + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(header)
+        f.write(packCells(model))
+    os.replace(temporary, filename)
+
+def loadGame(filename, modelClass = MinesweeperArrayModel):
+    """
+    Загружает состояние игры из файла filename и возвращает новую модель
+    класса modelClass (MinesweeperArrayModel или MinesweeperModel).
+    """
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as data:
+        if len(data) < HEADER.size:
+            raise ValueError('Not a minesweeper save file!')
+        magic, version, flags, rowCount, columnCount, mineCount, closedSafeCount, seed = \
+                HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError('Not a minesweeper save file!')
+        if version != VERSION:
+            raise ValueError('Unsupported save file version: %d' % version)
+        cellCount = rowCount * columnCount
+        if len(data) < HEADER.size + cellCount:
+            raise ValueError('Save file is truncated!')
+        cells = data[HEADER.size:HEADER.size + cellCount]
+
+    model = modelClass()
+    model.startGame(rowCount, columnCount, mineCount, seed if flags & FLAG_SEED else None)
+    if (model.rowCount, model.columnCount) != (rowCount, columnCount):
+        raise ValueError('Board %dx%d is not supported by %s' % (rowCount, columnCount, modelClass.__name__))
+    model.mineCount = mineCount
+    model.closedSafeCount = closedSafeCount
+    model.firstStep = bool(flags & FLAG_FIRST_STEP)
+    model.gameOver = bool(flags & FLAG_GAME_OVER)
+
+    if isinstance(model, MinesweeperArrayModel):
+        model.mines = bytearray(cells.translate(MINE_TABLE))
+        model.states = bytearray(cells.translate(STATE_TABLE))
+        model.counters = bytearray(cells.translate(COUNTER_TABLE))
+    else:
+        for index, value in enumerate(cells):
+            cell = model.cellsTable[index // columnCount][index % columnCount]
+            cell.mined = bool(value & 1)
+            cell.stateCode = (value >> 1) & 3
+            cell.counter = value >> 4
+    # Без сохраненного зерна startGame выбрал новое, которое не имеет
+    # отношения к загруженным минам и не должно попасть в журнал или снимок.
+    if not flags & FLAG_SEED:
+        model.seed = None
+    return model
+
+def test(argv=sys.argv):
+    import time
+    import tempfile
+
+    model = MinesweeperArrayModel()
+    model.startGame(2000, 2000, 500000, seed = 1)
+    model.openCell(1000, 1000)
+    filename = os.path.join(tempfile.mkdtemp(), 'game.msw')
+
+    started = time.perf_counter()
+    saveGame(model, filename)
+    saved = time.perf_counter()
+    loaded = loadGame(filename)
+    finished = time.perf_counter()
+    print('2000x2000: %d bytes, save %.3f s, load %.3f s, identical: %s' % (
+            os.path.getsize(filename), saved - started, finished - saved,
+            (loaded.mines, loaded.states, loaded.counters) == (model.mines, model.states, model.counters)))
+
+if __name__ == "__main__":
+    sys.exit(test())
@@ -0,0 +1,237 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Многосессионный сервер игры Сапер на asyncio.
+Клиенты подключаются по TCP или Unix-сокету и обмениваются
+строками JSON (одна строка - один запрос или ответ):
+
+    {"cmd": "new", "rows": 16, "columns": 30, "mines": 99, "seed": 1}
+        -> {"ok": true, "session": "...", "rows": 16, "columns": 30, "mines": 99}
+    {"cmd": "open" | "mark" | "chord", "session": "...", "row": 0, "column": 0}
+        -> {"ok": true, "changed": [[row, column, state, counter], ...],
+            "win": false, "over": false}
+    {"cmd": "close", "session": "..."}
+        -> {"ok": true}
+
+Ответ на ход содержит только изменившиеся ячейки; при проигрыше
+дополнительно передается список мин "mines". Поле "id" запроса,
+если оно есть, возвращается в ответе. Ошибки возвращаются как
+{"ok": false, "error": "..."}.
+Сессии хранятся в памяти и удаляются после простоя. Суммарное число
+ячеек всех полей ограничено MAX_TOTAL_CELLS: новая игра сверх этого
+предела отвергается.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import secrets
+
+from minesweeper import MinesweeperModel, MinesweeperArrayModel
+
+ENGINES = {
+    'object': MinesweeperModel,
+    'array': MinesweeperArrayModel,
+}
+
+SESSION_TIMEOUT = 300
+MAX_SESSIONS = 100000
+MAX_BOARD_CELLS = 1000000
+# Предел суммарного числа ячеек всех сессий сервера.
+MAX_TOTAL_CELLS = 50000000
+
+def getInteger(request, name, default = None):
+    """
+    Возвращает целочисленное поле запроса name. Поле должно быть
+    целым числом JSON: строки, дробные числа и true/false отвергаются.
+    """
+    value = request.get(name, default) if default is not None else request[name]
+    if type(value) is not int:
+        raise ValueError('%r must be an integer!' % name)
+    return value
+
+class MinesweeperSession:
+    """
+    Сессия игры: модель и время последнего обращения.
+    """
+    __slots__ = ('model', 'lastUsed')
+
+    def __init__(self, model):
+        self.model = model
+        self.lastUsed = time.monotonic()
+
+
+class MinesweeperServer:
+    """
+    Класс сервера. Хранит сессии и обрабатывает запросы.
+    """
+    def __init__(self, sessionTimeout = SESSION_TIMEOUT, maxSessions = MAX_SESSIONS,
+            maxBoardCells = MAX_BOARD_CELLS, maxTotalCells = MAX_TOTAL_CELLS):
+        self.sessionTimeout = sessionTimeout
+        self.maxSessions = maxSessions
+        self.maxBoardCells = maxBoardCells
+        self.maxTotalCells = maxTotalCells
+        self.sessions = {}
+        # Суммарное число ячеек полей всех сессий.
+        self.totalCells = 0
+
+    def handleRequest(self, request):
+        """
+        Обрабатывает один запрос (словарь) и возвращает ответ (словарь).
+        """
+        if not isinstance(request, dict):
+            raise ValueError('Request must be a JSON object!')
+        command = request.get('cmd')
+        if command == 'new':
+            return self.newGame(request)
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            raise ValueError('Unknown session!')
+        session.lastUsed = time.monotonic()
+        if command == 'close':
+            self.removeSession(request['session'])
+            return {'ok': True}
+        if command in ('open', 'mark', 'chord'):
+            return self.move(session.model, command, getInteger(request, 'row'), getInteger(request, 'column'))
+        raise ValueError('Unknown command: %r' % command)
+
+    def newGame(self, request):
+        if len(self.sessions) >= self.maxSessions:
+            self.evictIdleSessions()
+            if len(self.sessions) >= self.maxSessions:
+                raise ValueError('Too many sessions!')
+        rowCount = getInteger(request, 'rows', 15)
+        columnCount = getInteger(request, 'columns', 15)
+        mineCount = getInteger(request, 'mines', 28)
+        seed = request.get('seed')
+        if seed is not None and type(seed) is not int:
+            raise ValueError("'seed' must be an integer!")
+        if abs(rowCount * columnCount) > self.maxBoardCells:
+            raise ValueError('Board is too large!')
+        engine = ENGINES.get(request.get('engine', 'array'))
+        if engine is None:
+            raise ValueError('Unknown engine: %r' % request.get('engine'))
+        rowCount, columnCount, mineCount = engine.clampSettings(rowCount, columnCount, mineCount)
+        cellCount = rowCount * columnCount
+        if self.totalCells + cellCount > self.maxTotalCells:
+            self.evictIdleSessions()
+            if self.totalCells + cellCount > self.maxTotalCells:
+                raise ValueError('Server is out of board capacity!')
+        model = engine()
+        # Ответ на ход содержит ячейки, изменившиеся с прошлого запроса.
+        model.trackDirtyCells()
+        model.startGame(rowCount, columnCount, mineCount, seed)
+
+        sessionId = secrets.token_hex(8)
+        self.sessions[sessionId] = MinesweeperSession(model)
+        self.totalCells += model.cellCount
+        return {
+            'ok': True,
+            'session': sessionId,
+            'rows': model.rowCount,
+            'columns': model.columnCount,
+            'mines': model.mineCount,
+        }
+
+    def move(self, model, command, row, column):
+        if not 0 <= row < model.rowCount or not 0 <= column < model.columnCount:
+            raise ValueError('Not in range!')
+        if command == 'open':
+            model.openCell(row, column, False)
+        elif command == 'mark':
+            model.nextCellMark(row, column)
+        else:
+            model.openClearNeighbours(row, column, False)
+
+        changed = []
+        for r, c in model.popDirtyCells():
+            cell = model.getCell(r, c)
+            changed.append([r, c, cell.state, cell.counter if cell.state == 'opened' else 0])
+        response = {'ok': True, 'changed': changed, 'win': model.isWin(), 'over': model.isGameOver()}
+        if response['over']:
+            response['mines'] = [list(divmod(index, model.columnCount)) for index in model.getMineIndexes()]
+        return response
+
+    def removeSession(self, sessionId):
+        """
+        Удаляет сессию и возвращает ее ячейки в общий предел.
+        """
+        session = self.sessions.pop(sessionId)
+        self.totalCells -= session.model.cellCount
+
+    def evictIdleSessions(self):
+        """
+        Удаляет сессии, к которым не обращались дольше sessionTimeout секунд.
+        """
+        deadline = time.monotonic() - self.sessionTimeout
+        for sessionId in [s for s, session in self.sessions.items() if session.lastUsed < deadline]:
+            self.removeSession(sessionId)
+
+    async def evictionLoop(self):
+        while True:
+            await asyncio.sleep(max(1, self.sessionTimeout / 10))
+            self.evictIdleSessions()
+
+    async def handleConnection(self, reader, writer):
+        """
+        Обслуживает одно соединение: читает запросы построчно
+        и отвечает на каждый из них. Ошибка в запросе возвращается
+        клиенту и не прерывает соединение.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    response = self.handleRequest(request)
+                except KeyError as e:
+                    response = {'ok': False, 'error': 'Missing field: %s' % e}
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e) or type(e).__name__}
+                if isinstance(request, dict) and 'id' in request:
+                    response['id'] = request['id']
+                writer.write(json.dumps(response, separators = (',', ':')).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host = '127.0.0.1', port = 8765, path = None):
+        if path:
+            server = await asyncio.start_unix_server(self.handleConnection, path)
+        else:
+            server = await asyncio.start_server(self.handleConnection, host, port)
+        eviction = asyncio.ensure_future(self.evictionLoop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            eviction.cancel()
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description = 'Minesweeper JSON-lines game server.')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8765)
+    parser.add_argument('--unix', help = 'listen on this Unix socket instead of TCP')
+    parser.add_argument('--timeout', type = float, default = SESSION_TIMEOUT,
+            help = 'idle seconds before a session is evicted')
+    parser.add_argument('--max-sessions', type = int, default = MAX_SESSIONS)
+    parser.add_argument('--max-total-cells', type = int, default = MAX_TOTAL_CELLS,
+            help = 'cells of all boards together')
+    args = parser.parse_args(argv[1:])
+
+    server = MinesweeperServer(args.timeout, args.max_sessions, maxTotalCells = args.max_total_cells)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Решатель (подсказчик) для Сапера.
+По открытым числам находит ячейки, которые заведомо безопасны,
+и ячейки, которые заведомо заминированы. Используются правило
+одной ячейки и правило подмножеств для пар соседних чисел.
+Решатель хранит границу (frontier) - открытые числа с еще
+неизвестными соседями - и после каждого хода пересматривает
+только ячейки рядом с изменившимися.
+"""
+
+import sys
+
+class MinesweeperSolver:
+    """
+    Класс решателя.
+    Работает с любой моделью, у которой есть getCell и getCellNeighbours.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.reset()
+
+    def reset(self):
+        """
+        Сбрасывает выводы и заново просматривает все открытые ячейки поля.
+        Нужно вызывать после начала новой игры.
+        """
+        # Закрытые ячейки, которые заведомо безопасны.
+        self.safeCells = set()
+        # Ячейки, которые заведомо заминированы.
+        self.mineCells = set()
+        # Открытые числа, у которых остались неизвестные соседи.
+        self.frontier = set()
+        self.pending = set()
+        for row in range(self.model.rowCount):
+            for column in range(self.model.columnCount):
+                if self.model.getCell(row, column).state == 'opened':
+                    self.pending.add((row, column))
+        self.propagate()
+
+    def update(self, openedCells):
+        """
+        Учитывает ячейки, открытые последним ходом (список адресов,
+        который возвращают openCell и openClearNeighbours),
+        и пересматривает выводы только вокруг них.
+        """
+        for row, column in openedCells:
+            self.safeCells.discard((row, column))
+            self.pending.add((row, column))
+            for n in self.model.getCellNeighbours(row, column):
+                if n.state == 'opened':
+                    self.pending.add((n.row, n.column))
+        self.propagate()
+
+    def getConstraint(self, row, column):
+        """
+        Возвращает пару (unknown, remaining) для открытой ячейки:
+        множество соседей, о которых ничего не известно,
+        и число мин среди них.
+        """
+        cell = self.model.getCell(row, column)
+        remaining = cell.counter
+        unknown = set()
+        for n in self.model.getCellNeighbours(row, column):
+            address = (n.row, n.column)
+            if address in self.mineCells:
+                remaining -= 1
+            elif n.state != 'opened' and address not in self.safeCells:
+                unknown.add(address)
+        return unknown, remaining
+
+    def propagate(self):
+        """
+        Применяет правила вывода к отложенным ячейкам, пока появляются
+        новые выводы.
+        """
+        while self.pending:
+            row, column = self.pending.pop()
+            if self.model.getCell(row, column).state != 'opened':
+                continue
+            unknown, remaining = self.getConstraint(row, column)
+            if not unknown:
+                self.frontier.discard((row, column))
+                continue
+            self.frontier.add((row, column))
+
+            if remaining == 0:
+                self.deduce(unknown, False)
+            elif remaining == len(unknown):
+                self.deduce(unknown, True)
+            else:
+                self.applySubsetRule(row, column, unknown, remaining)
+
+    def applySubsetRule(self, row, column, unknown, remaining):
+        """
+        Сравнивает ограничение ячейки с ограничениями соседних чисел
+        границы: если неизвестные одной ячейки входят в неизвестные другой,
+        то разность содержит ровно разность их мин.
+        """
+        for r in range(row - 2, row + 3):
+            for c in range(column - 2, column + 3):
+                if (r, c) == (row, column) or (r, c) not in self.frontier:
+                    continue
+                otherUnknown, otherRemaining = self.getConstraint(r, c)
+                if unknown < otherUnknown:
+                    self.deduceDifference(otherUnknown - unknown, otherRemaining - remaining)
+                elif otherUnknown < unknown:
+                    self.deduceDifference(unknown - otherUnknown, remaining - otherRemaining)
+
+    def deduceDifference(self, cells, mineCount):
+        if mineCount == 0:
+            self.deduce(cells, False)
+        elif mineCount == len(cells):
+            self.deduce(cells, True)
+
+    def deduce(self, cells, mined):
+        """
+        Запоминает вывод о ячейках cells и откладывает на пересмотр
+        открытые числа вокруг них.
+        """
+        known = self.mineCells if mined else self.safeCells
+        for row, column in cells:
+            if (row, column) in known:
+                continue
+            known.add((row, column))
+            for n in self.model.getCellNeighbours(row, column):
+                if n.state == 'opened':
+                    self.pending.add((n.row, n.column))
+
+    def getHint(self):
+        """
+        Возвращает адрес заведомо безопасной закрытой ячейки или None.
+        """
+        for address in self.safeCells:
+            return address
+        return None
+
+    def flagMines(self):
+        """
+        Помечает флажками все ячейки, которые заведомо заминированы.
+        """
+        for row, column in self.mineCells:
+            cell = self.model.getCell(row, column)
+            while cell.state != 'flagged':
+                self.model.nextCellMark(row, column)
+
+
+class SolverPolicy:
+    """
+    Стратегия для minesweeper_runner: открывает безопасные ячейки,
+    найденные решателем, а при их отсутствии - случайную закрытую
+    ячейку, не являющуюся заведомой миной.
+    """
+    def newGame(self, model):
+        self.solver = MinesweeperSolver(model)
+
+    def observe(self, model, openedCells):
+        self.solver.update(openedCells)
+
+    def __call__(self, model, rng):
+        hint = self.solver.getHint()
+        if hint:
+            return ('open',) + hint
+        candidates = [
+                (row, column)
+                for row in range(model.rowCount)
+                for column in range(model.columnCount)
+                if model.getCell(row, column).state == 'closed'
+                and (row, column) not in self.solver.mineCells
+        ]
+        return ('open',) + rng.choice(candidates)
+
+def test(argv=sys.argv):
+    from minesweeper import MinesweeperModel
+
+    model = MinesweeperModel()
+    model.startGame(15, 15, 28, seed = 1)
+    solver = MinesweeperSolver(model)
+    solver.update(model.openCell(7, 7))
+    while solver.safeCells and not model.isGameOver():
+        solver.update(model.openCell(*solver.getHint()))
+    print('opened without guessing: %d, known mines: %d, win: %s' % (
+            model.rowCount * model.columnCount - model.mineCount - model.closedSafeCount,
+            len(solver.mineCells), model.isWin()))
+
+if __name__ == "__main__":
+    sys.exit(test())
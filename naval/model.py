@@ -2,15 +2,22 @@
 # -*- encoding: utf-8 -*-
 
 import sys
-import random
 from objects.board import Board
+from objects.bitboard import BitBoard
+from objects.placement import place_ships
+from players import HuntTargetPlayer
 
 class NavalModel:
     """
     Класс реализующий модель.
+    board_class - класс игрового поля: Board или BitBoard,
+    player_class - класс компьютерного игрока (см. players).
     """
-    def __init__(self):
+    def __init__(self, board_class=Board, player_class=HuntTargetPlayer):
+        self.board_class = board_class
+        self.player_class = player_class
         self.c_board, self.h_board = None, None
+        self.c_player = None
 
     def new_game(self, board_size, ship_size):
         """
@@ -20,14 +27,15 @@ class NavalModel:
         self.__max_size_ship = ship_size
         self.human_step = False
         self.game_started = False
-        if self.c_board and self.h_board:
+        if self.c_board and self.h_board and self.c_board.get_size() == board_size:
             self.c_board.clear()
-            slef.h_board.clear()
+            self.h_board.clear()
         else:
-            self.c_board = Board(self.__board_size)
-            self.h_board = Board(self.__board_size)
+            self.c_board = self.board_class(self.__board_size)
+            self.h_board = self.board_class(self.__board_size)
         self.random_place_ships(self.c_board)
         self.random_place_ships(self.h_board)
+        self.c_player = self.player_class(self.__board_size, self.get_ships_list())
         self.h_board.set_visible(True)
         self.game_started = True
         self.human_step = True
@@ -43,32 +51,34 @@ class NavalModel:
         return ships_list
 
     def random_place_ships(self, board):
+        """
+        Случайная расстановка кораблей из get_ships_list.
+        Позиции выбираются только среди допустимых (см. objects.placement);
+        если флот не помещается на поле, выбрасывается исключение.
+        """
         ships_list = self.get_ships_list()
-        for count in ships_list:
-            while True:
-                try:
-                    board.add_ship(random.randint(0, self.__board_size - 1),
-                            random.randint(0, self.__board_size -1),
-                            random.choice(['horizontal', 'vertical']),
-                            count)
-                except Exception:
-                    continue
-                break
+        for x, y, direction, count in place_ships(self.__board_size, ships_list):
+            board.add_ship(x, y, direction, count)
         self.mark_ships(board)
 
     def c_fire(self):
         """
-        Простейшая реализация компьютерной логики -
-        это ее отсутствие :)
+        Ход компьютера: игрок c_player стреляет по полю человека,
+        пока попадает. Возвращает число сделанных выстрелов.
         """
+        shots = 0
         success = True
-        while success:
-            x = random.randint(0, self.__baord_size - 1)
-            y = random.randint(0, self.__board_size - 1)
-            try:
-                success = fire(x, y, self.h_board)
-            except Exception:
-                success = True
+        while success and self.c_player.has_shots():
+            x, y = self.c_player.next_shot()
+            success = self.fire(x, y, self.h_board)
+            shots += 1
+            sunk_cells = None
+            if success:
+                ship = self.h_board.cell_in_ship(x, y)
+                if ship.is_sunk():
+                    sunk_cells = [(cell.get_x(), cell.get_y()) for cell in ship.get_cells()]
+            self.c_player.observe(x, y, success, sunk_cells)
+        return shots
 
     def fire(self, x, y, board):
         if not 0 <= x < self.__board_size or not 0 <= y < self.__board_size:
@@ -94,6 +104,9 @@ def test(argv=sys.argv):
     mod.new_game(10, 4)
     print(mod.c_board)
     print(mod.h_board)
+    mod = NavalModel(BitBoard)
+    mod.new_game(10, 4)
+    print(mod.h_board)
 
 if __name__ == "__main__":
     sys.exit(test())
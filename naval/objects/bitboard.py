@@ -0,0 +1,321 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Игровое поле на битовых масках.
+Интерфейс совпадает с Board, но вместо двумерного списка объектов Cell
+поле хранит несколько целых чисел: маску открытых ячеек и по маске
+на каждую метку ('ship', 'bang', 'sunk').
+Ячейка (x, y) - бит y * size + x. Соседи ячеек и кораблей вычисляются
+сдвигами масок, а копия поля - это копия нескольких чисел.
+"""
+
+import sys
+
+if __name__ == '__main__':
+    from ship import Ship
+else:
+    from . ship import Ship
+
+class BitCell:
+    """
+    Ячейка поля BitBoard.
+    Не хранит собственного состояния, а читает и пишет биты масок поля,
+    поэтому совместима с кодом, работающим с Cell.
+    """
+    __slots__ = ('board', 'x', 'y', 'bit')
+
+    def __init__(self, board, x, y):
+        self.board = board
+        self.x = x
+        self.y = y
+        self.bit = 1 << (y * board.get_size() + x)
+
+    def init_state(self):
+        """
+        Привести ячейку к исходному состоянию:
+            - ячейка закрыта;
+            - ячейка пустая.
+        """
+        self.board.reset_bits(self.bit)
+
+    def get_x(self):
+        """
+        Возвращает координату x ячейки.
+        """
+        return self.x
+
+    def get_y(self):
+        """
+        Возвращает координату y ячейки.
+        """
+        return self.y
+
+    def open(self):
+        """
+        Открыть ячейку.
+        """
+        self.board.open_bits(self.bit)
+        return self.get_mark()
+
+    def get_mark(self):
+        """
+        Вернуть значение метки ячейки.
+        """
+        return self.board.get_bit_mark(self.bit)
+
+    def set_mark(self, mark):
+        """
+        Пометить ячейку.
+        """
+        self.board.set_bits_mark(self.bit, mark)
+
+    def is_opened(self):
+        """
+        True, если ячейка отрыта.
+        """
+        return self.board.is_bit_opened(self.bit)
+
+    def __eq__(self, other):
+        return isinstance(other, BitCell) and self.board is other.board and self.bit == other.bit
+
+    def __hash__(self):
+        return hash(self.bit)
+
+    def __str__(self):
+        return 'Cell(%d, %d){state = %s, mark = %s}'%(self.x, self.y,
+                'opened' if self.is_opened() else 'closed', self.get_mark())
+
+
+class BitBoard:
+    """
+    Класс реализует абстракцию игрового поля на битовых масках.
+    """
+    def __init__(self, size):
+        self.__size = size
+        self.__ships = []
+        self.__visible = False
+        self.create()
+
+    def create(self):
+        """
+        Метод создания объекта BitBoard.
+        """
+        size = self.__size
+        self.__full = (1 << (size * size)) - 1
+        # Маски всех ячеек, кроме первого и последнего столбцов:
+        # при сдвиге на одну ячейку биты не должны переходить на другую строку.
+        row = sum(1 << x for x in range(size))
+        rows = sum(row << (y * size) for y in range(size))
+        first_column = sum(1 << (y * size) for y in range(size))
+        self.__not_first_column = rows & ~first_column
+        self.__not_last_column = rows & ~(first_column << (size - 1))
+        # Маска открытых ячеек и маски меток.
+        self.__opened = 0
+        self.__marks = {}
+        # Индекс координат (x, y) палуб -> корабль.
+        self.__ship_cells = {}
+
+    def copy(self):
+        """
+        Возвращает независимую копию поля. Корабли копии состоят из ячеек копии.
+        """
+        board = BitBoard.__new__(BitBoard)
+        board.__dict__.update(self.__dict__)
+        board.__marks = dict(self.__marks)
+        board.__ships = []
+        board.__ship_cells = {}
+        for ship in self.__ships:
+            copy = Ship([board.get_cell(cell.get_x(), cell.get_y()) for cell in ship.get_cells()])
+            board.__ships.append(copy)
+            for cell in copy.get_cells():
+                board.__ship_cells[(cell.get_x(), cell.get_y())] = copy
+        return board
+
+    def set_visible(self, vis):
+        """
+        Метод служит для задания атрибута видимости содержимого ячеек
+        данного поля.
+        """
+        self.__visible = vis
+
+    def get_visible(self):
+        """
+        Получить значение атрибута видимости.
+        """
+        return self.__visible
+
+    def get_size(self):
+        """
+        Получить размер поля.
+        """
+        return self.__size
+
+    def get_ships(self):
+        """
+        Получить список кораблей размещенных на поле.
+        """
+        return self.__ships
+
+    def get_cell(self, x, y):
+        """
+        Возвращает ячейку с координатами x, y.
+        """
+        if not 0 <= x < self.__size or not 0 <= y < self.__size:
+            raise IndexError('Not in range!')
+        return BitCell(self, x, y)
+
+    def get_bit_mark(self, bit):
+        for mark, mask in self.__marks.items():
+            if mask & bit:
+                return mark
+        return 'empty'
+
+    def set_bits_mark(self, bits, mark):
+        for name in self.__marks:
+            self.__marks[name] &= ~bits
+        if mark != 'empty':
+            self.__marks[mark] = self.__marks.get(mark, 0) | bits
+
+    def open_bits(self, bits):
+        self.__opened |= bits
+
+    def is_bit_opened(self, bit):
+        return bool(self.__opened & bit)
+
+    def reset_bits(self, bits):
+        self.__opened &= ~bits
+        self.set_bits_mark(bits, 'empty')
+
+    def get_mask_cells(self, mask):
+        """
+        Возвращает множество ячеек, биты которых установлены в маске.
+        """
+        cells = set()
+        while mask:
+            low = mask & -mask
+            y, x = divmod(low.bit_length() - 1, self.__size)
+            cells.add(BitCell(self, x, y))
+            mask ^= low
+        return cells
+
+    def get_mask_neighbours(self, mask):
+        """
+        Возвращает маску ячеек, соседних с ячейками маски (без них самих).
+        """
+        row = mask | ((mask << 1) & self.__not_first_column) | ((mask >> 1) & self.__not_last_column)
+        around = row | (row << self.__size) | (row >> self.__size)
+        return around & self.__full & ~mask
+
+    def get_cell_neighbours(self, x, y):
+        """
+        Возвращает список ячеек соседних ячейке заданной координатами.
+        """
+        return self.get_mask_cells(self.get_mask_neighbours(self.get_cell(x, y).bit))
+
+    def get_ship_neighbours(self, ship):
+        """
+        Возвращает список ячеек соседних для данного корабля.
+        """
+        mask = 0
+        for cell in ship.get_cells():
+            mask |= 1 << (cell.get_y() * self.__size + cell.get_x())
+        return self.get_mask_cells(self.get_mask_neighbours(mask))
+
+    def mark_cells(self, cells, mark):
+        """
+        Пометить ячейку.
+        """
+        mask = 0
+        for cell in cells:
+            mask |= 1 << (cell.get_y() * self.__size + cell.get_x())
+        self.set_bits_mark(mask, mark)
+
+    def add_ship(self, x, y, direction, count):
+        """
+        Метод добавления корабля.
+        """
+        size = self.__size
+        if not 0 <= x <= (size - 1) or not 0 <= y <= (size - 1):
+            raise Exception('Not in range!')
+        # Как и в Board, занятыми считаются ячейки с меткой 'ship'.
+        ships = self.__marks.get('ship', 0)
+        if ships >> (y * size + x) & 1:
+            raise Exception('There is already a ship!')
+        if direction == 'horizontal':
+            x = self.shift_ship(x, count)
+            coords = [(x + i, y) for i in range(count)]
+        elif direction == 'vertical':
+            y = self.shift_ship(y, count)
+            coords = [(x, y + i) for i in range(count)]
+        else:
+            coords = []
+        mask = 0
+        for cx, cy in coords:
+            if not 0 <= cx < size or not 0 <= cy < size:
+                raise Exception('Not in range!')
+            mask |= 1 << (cy * size + cx)
+        if mask & ships:
+            raise Exception('There is already a ship!!')
+        if self.get_mask_neighbours(mask) & ships:
+            raise Exception('There is already a ship!!!')
+        ship = Ship([BitCell(self, cx, cy) for cx, cy in coords])
+        self.__ships.append(ship)
+        for coord in coords:
+            self.__ship_cells[coord] = ship
+        self.set_bits_mark(mask, 'ship')
+
+    def shift_ship(self, coord, count):
+        if coord + count > self.__size:
+            return self.__size - coord
+        return coord
+
+    def cell_in_ship(self, x, y):
+        """
+        Возвращает объект корабля, которому принадлежит ячейка с заданными координатами.
+        """
+        return self.__ship_cells.get((x, y))
+
+    def clear(self):
+        """
+        Очистка игрового поля.
+        """
+        self.__ships = []
+        self.create()
+
+    def __str__(self):
+        symbols = {'empty': '~ ', 'ship': 'o ', 'bang': '* ', 'sunk': 'x '}
+        rows = ''
+        bit = 1
+        for i in range(self.__size):
+            column = ''
+            for j in range(self.__size):
+                opened = self.__opened & bit
+                mark = self.get_bit_mark(bit)
+                bit <<= 1
+                if not self.__visible and not opened or mark == 'empty' and not opened:
+                    column += '` '
+                else:
+                    column += symbols.get(mark, '? ')
+            rows += column + '\n'
+        return rows
+
+def test(argv=sys.argv):
+    bd = BitBoard(10)
+    bd.add_ship(3, 3, 'horizontal', 4)
+    bd.add_ship(3, 5, 'vertical', 2)
+    bd.add_ship(1, 1, 'horizontal', 1)
+    for x, y in [(3, 3), (4, 3), (5, 3), (6, 3), (1, 1), (0, 0), (3, 6)]:
+        bd.get_cell(x, y).open()
+        ship = bd.cell_in_ship(x, y)
+        if ship:
+            bd.get_cell(x, y).set_mark('bang')
+            if ship.is_sunk():
+                bd.mark_cells(ship.get_cells(), 'sunk')
+    print(bd)
+    bd.set_visible(True)
+    print(bd)
+    print(bd.cell_in_ship(3, 5))
+
+if __name__ == '__main__':
+    sys.exit(test())
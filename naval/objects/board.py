@@ -18,6 +18,8 @@ class Board:
         self.__size = size
         self.__cells = []
         self.__ships = []
+        # Индекс координат (x, y) палуб -> корабль.
+        self.__ship_cells = {}
         self.__visible = False
         self.create()
 
@@ -45,6 +47,12 @@ class Board:
         """
         return self.__visible
 
+    def get_size(self):
+        """
+        Получить размер поля.
+        """
+        return self.__size
+
     def get_ships(self):
         """
         Получить список кораблей размещенных на поле.
@@ -77,7 +85,7 @@ class Board:
         """
         neighbours = set()
         for cell in ship.get_cells():
-            neighbours.add(self.get_cell_neighbours(cell.get_x(), cell.get_y()))
+            neighbours.update(self.get_cell_neighbours(cell.get_x(), cell.get_y()))
         return neighbours.difference(set(ship.get_cells()))
     
     def mark_cells(self, cells, mark):
@@ -110,7 +118,10 @@ class Board:
             for item in self.get_cell_neighbours(cell.get_x(), cell.get_y()):
                 if item.get_mark() == 'ship':
                     raise Exception('There is already a ship!!!')
-        self.__ships.append(Ship(cells))
+        ship = Ship(cells)
+        self.__ships.append(ship)
+        for cell in cells:
+            self.__ship_cells[(cell.get_x(), cell.get_y())] = ship
         self.mark_cells(cells, 'ship')
 
     def shift_ship(self, coord, count):
@@ -122,18 +133,17 @@ class Board:
         """
         Возвращает объект корабля, которому принадлежит ячейка с заданными координатами.
         """
-        for ship in self.__ships:
-            for cell in ship.get_cells():
-                if cell.get_x() == x and cell.get_y() == y:
-                    return ship
-        return None
+        return self.__ship_cells.get((x, y))
 
     def clear(self):
         """
         Очистка игрового поля.
         """
-        for cell in self.__cells:
-            cell.init_state()
+        for row in self.__cells:
+            for cell in row:
+                cell.init_state()
+        self.__ships = []
+        self.__ship_cells = {}
 
     def __str__(self):
         rows = ''
@@ -171,6 +181,8 @@ def test(argv=sys.argv):
     print(bd)
     bd.set_visible(True)
     print(bd)
+    print(bd.cell_in_ship(4, 3))
+    print(bd.cell_in_ship(4, 4))
  
 if __name__ == '__main__':
     sys.exit(test())
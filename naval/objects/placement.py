@@ -0,0 +1,231 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Расстановка флота на поле по битовым маскам.
+Ячейка (x, y) поля размера size - бит y * size + x целого числа.
+Стоящие корабли вместе с соседними ячейками образуют маску запрещенных
+ячеек, и множество всех допустимых позиций корабля (левых верхних палуб)
+вычисляется по ней несколькими сдвигами и пересечениями. Поэтому корабль
+ставится сразу в случайную допустимую позицию, без повторных попыток.
+Если флот не помещается, это обнаруживается перебором с возвратами.
+"""
+
+import sys
+import random
+import functools
+
+DIRECTIONS = ('horizontal', 'vertical')
+
+# Число случайных попыток расстановки до перехода к полному перебору.
+MAX_RANDOM_ATTEMPTS = 100
+# Наибольшее число шагов полного перебора.
+MAX_SEARCH_STEPS = 200000
+
+@functools.lru_cache(maxsize=16384)
+def get_rectangle(size, x, y, width, height):
+    """
+    Возвращает маску прямоугольника width x height с левым верхним углом
+    в (x, y), обрезанного границами поля.
+    """
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, size), min(y + height, size)
+    row = (1 << (x1 - x0)) - 1
+    mask = 0
+    for i in range(y1 - y0):
+        mask |= row << (i * size)
+    return mask << (y0 * size + x0)
+
+@functools.lru_cache(maxsize=None)
+def get_anchor_mask(size, count):
+    """
+    Маска ячеек, с которых может начинаться горизонтальный корабль
+    из count палуб (столбцы 0..size - count каждой строки).
+    """
+    return get_rectangle(size, 0, 0, size - count + 1, size)
+
+def get_legal_anchors(size, count, blocked):
+    """
+    Возвращает пару масок (horizontal, vertical) допустимых позиций
+    корабля из count палуб при запрещенных ячейках blocked.
+    """
+    free = ((1 << (size * size)) - 1) & ~blocked
+    horizontal = vertical = free
+    for i in range(1, count):
+        horizontal &= free >> i
+        vertical &= free >> (i * size)
+    horizontal &= get_anchor_mask(size, count)
+    # Однопалубный корабль в обоих направлениях занимает одну и ту же ячейку.
+    return horizontal, vertical if count > 1 else 0
+
+def select_bit(mask, n):
+    """
+    Возвращает номер n-го (с нуля) единичного бита маски.
+    """
+    bits = bin(mask)[:1:-1]
+    index = -1
+    for i in range(n + 1):
+        index = bits.find('1', index + 1)
+    return index
+
+def get_ship_masks(size, x, y, direction, count):
+    """
+    Возвращает пару масок (cells, forbidden) корабля: палубы
+    и палубы вместе с соседними ячейками.
+    """
+    width, height = (count, 1) if direction == 'horizontal' else (1, count)
+    return (get_rectangle(size, x, y, width, height),
+            get_rectangle(size, x - 1, y - 1, width + 2, height + 2))
+
+def choose_anchor(options, rng):
+    """
+    Выбирает равновероятно одну позицию из списка вариантов
+    (count, direction, anchors), где anchors - маска допустимых позиций.
+    Возвращает (count, direction, index) или None, если позиций нет.
+    """
+    counts = [bin(anchors).count('1') for count, direction, anchors in options]
+    if not sum(counts):
+        return None
+    n = rng.randrange(sum(counts))
+    for (count, direction, anchors), number in zip(options, counts):
+        if n < number:
+            return count, direction, select_bit(anchors, n)
+        n -= number
+
+def random_placement(size, ships_list, rng, blocked=0, required=0):
+    """
+    Одна попытка случайной расстановки: каждый корабль ставится в случайную
+    из допустимых позиций. Возвращает None, если очередному кораблю места нет.
+    blocked - ячейки, где кораблей быть не может, required - ячейки, которые
+    обязательно заняты кораблями: сначала ставятся корабли, покрывающие их.
+    """
+    ships = list(ships_list)
+    placement = []
+
+    def place(count, direction, index):
+        y, x = divmod(index, size)
+        cells, forbidden = get_ship_masks(size, x, y, direction, count)
+        ships.remove(count)
+        placement.append((x, y, direction, count))
+        return cells, forbidden
+
+    while required:
+        y, x = divmod((required & -required).bit_length() - 1, size)
+        options = []
+        for count in sorted(set(ships)):
+            horizontal, vertical = get_legal_anchors(size, count, blocked)
+            options.append((count, 'horizontal', horizontal & get_rectangle(size, x - count + 1, y, count, 1)))
+            options.append((count, 'vertical', vertical & get_rectangle(size, x, y - count + 1, 1, count)))
+        choice = choose_anchor(options, rng)
+        if choice is None:
+            return None
+        cells, forbidden = place(*choice)
+        blocked |= forbidden
+        required &= ~cells
+
+    for count in list(ships):
+        horizontal, vertical = get_legal_anchors(size, count, blocked)
+        choice = choose_anchor([(count, 'horizontal', horizontal), (count, 'vertical', vertical)], rng)
+        if choice is None:
+            return None
+        cells, forbidden = place(*choice)
+        blocked |= forbidden
+    return placement
+
+def search_placement(size, ships_list, rng, max_steps=MAX_SEARCH_STEPS):
+    """
+    Полный перебор с возвратами.
+    Корабль вместе с соседними ячейками справа и снизу - это прямоугольник
+    на поле (size + 1) x (size + 1), и корабли не касаются друг друга ровно
+    тогда, когда их прямоугольники не пересекаются. Поэтому перебор идет
+    как укладка прямоугольников: первую свободную ячейку поля либо занимает
+    левый верхний угол одного из оставшихся прямоугольников, либо она
+    остается пустой, пока не исчерпан запас пустых ячеек.
+    Тупиковые состояния запоминаются. Возвращает None, если флот
+    не помещается на поле; если за max_steps шагов ответ не найден,
+    выбрасывается исключение.
+    """
+    width = size + 1
+    sizes = sorted(set(ships_list), reverse=True)
+    rows = {count: (1 << (count + 1)) - 1 for count in sizes}
+    columns = {count: sum(1 << (i * width) for i in range(count + 1)) for count in sizes}
+    waste = width * width - sum(2 * (count + 1) for count in ships_list)
+    failed = set()
+    steps = [0]
+
+    def search(filled, remaining, waste):
+        if not any(remaining):
+            return []
+        if (filled, remaining) in failed:
+            return None
+        steps[0] += 1
+        if steps[0] > max_steps:
+            raise Exception('Placement search for fleet %s on the %dx%d board gave up after %d steps!' % (
+                    ships_list, size, size, max_steps))
+        first = (filled + 1) & ~filled
+        y, x = divmod(first.bit_length() - 1, width)
+        options = []
+        for i, count in enumerate(sizes):
+            if not remaining[i]:
+                continue
+            left = remaining[:i] + (remaining[i] - 1,) + remaining[i + 1:]
+            shapes = [('horizontal', x + count < width and y + 1 < width, rows[count] | rows[count] << width)]
+            if count > 1:
+                shapes.append(('vertical', x + 1 < width and y + count < width, columns[count] | columns[count] << 1))
+            for direction, fits, shape in shapes:
+                mask = shape << (y * width + x)
+                if fits and not mask & filled:
+                    options.append(((x, y, direction, count), filled | mask, left))
+        rng.shuffle(options)
+        for ship, next_filled, left in options:
+            rest = search(next_filled, left, waste)
+            if rest is not None:
+                return [ship] + rest
+        if waste:
+            rest = search(filled | first, remaining, waste - 1)
+            if rest is not None:
+                return rest
+        failed.add((filled, remaining))
+        return None
+
+    return search(0, tuple(ships_list.count(count) for count in sizes), waste)
+
+def place_ships(size, ships_list, rng=random):
+    """
+    Возвращает список позиций (x, y, direction, count) для кораблей
+    ships_list, пригодный для Board.add_ship.
+    Если флот не помещается на поле, выбрасывается исключение.
+    """
+    # Корабль вместе с соседними ячейками справа и снизу занимает
+    # прямоугольник 2 x (count + 1) на поле (size + 1) x (size + 1),
+    # и у разных кораблей эти прямоугольники не пересекаются.
+    if max(ships_list, default=0) <= size and sum(2 * (count + 1) for count in ships_list) <= (size + 1) ** 2:
+        for attempt in range(MAX_RANDOM_ATTEMPTS):
+            placement = random_placement(size, ships_list, rng)
+            if placement is not None:
+                return placement
+        placement = search_placement(size, ships_list, rng)
+        if placement is not None:
+            return placement
+    raise Exception('Fleet %s does not fit on the %dx%d board!' % (ships_list, size, size))
+
+def test(argv=sys.argv):
+    import time
+
+    fleets = [
+        (10, [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]),
+        (7, [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]),
+        (6, [4, 3, 3, 2, 2, 2, 1, 1, 1, 1]),
+        (100, [20 - i for i in range(20) for j in range(i + 1)]),
+    ]
+    for size, ships_list in fleets:
+        started = time.perf_counter()
+        try:
+            placement = place_ships(size, ships_list)
+            result = '%d ships placed' % len(placement)
+        except Exception as e:
+            result = str(e)
+        print('%dx%d: %s (%.3f s)' % (size, size, result, time.perf_counter() - started))
+
+if __name__ == '__main__':
+    sys.exit(test())
@@ -38,7 +38,7 @@ class Ship:
         не помечена как потопленная (т.е. все ячейки помечены
         как 'bang'), то пометить палубы как потопленные.
         """
-        for cell in self.cells:
+        for cell in self.__cells:
             if not cell.is_opened():
                 return False
             if cell.get_mark() == 'sunk':
@@ -0,0 +1,282 @@
+#! /usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Компьютерные игроки для NavalModel.c_fire.
+Игрок создается как player_class(size, ships_list), выбирает клетку
+выстрела (next_shot) и узнает результат (observe). Он видит только то,
+что видно на поле: попадание и клетки потопленного корабля.
+"""
+
+import sys
+import random
+
+from objects.placement import random_placement, get_ship_masks
+
+# Число расстановок флота, по которым MonteCarloPlayer оценивает вероятности.
+SAMPLE_COUNT = 1000
+# Наибольшее число попыток на одну расстановку.
+MAX_SAMPLE_ATTEMPTS = 20
+
+class RandomPlayer:
+    """
+    Игрок, стреляющий в случайные клетки.
+    Непроверенные клетки хранятся в списке; выбранная клетка удаляется
+    перестановкой с последней, поэтому выстрел занимает O(1)
+    и клетки не повторяются.
+    """
+    def __init__(self, size, ships_list=(), rng=random):
+        self.size = size
+        self.ships_list = list(ships_list)
+        self.rng = rng
+        self.untried = [(x, y) for y in range(size) for x in range(size)]
+        self.positions = {cell: index for index, cell in enumerate(self.untried)}
+
+    def has_shots(self):
+        """
+        True, если остались непроверенные клетки.
+        """
+        return bool(self.untried)
+
+    def is_untried(self, x, y):
+        return (x, y) in self.positions
+
+    def take(self, x, y):
+        """
+        Удаляет клетку из непроверенных.
+        """
+        index = self.positions.pop((x, y), None)
+        if index is None:
+            return
+        last = self.untried.pop()
+        if index < len(self.untried):
+            self.untried[index] = last
+            self.positions[last] = index
+
+    def get_around(self, x, y):
+        """
+        Клетка (x, y) и ее соседи в пределах поля.
+        """
+        for ny in range(max(y - 1, 0), min(y + 2, self.size)):
+            for nx in range(max(x - 1, 0), min(x + 2, self.size)):
+                yield nx, ny
+
+    def next_shot(self):
+        """
+        Возвращает координаты (x, y) следующего выстрела.
+        """
+        x, y = self.untried[self.rng.randrange(len(self.untried))]
+        self.take(x, y)
+        return x, y
+
+    def observe(self, x, y, hit, sunk_cells=None):
+        """
+        Сообщает результат выстрела: hit - попадание, sunk_cells - список
+        координат палуб корабля, если выстрел его потопил.
+        """
+        pass
+
+
+class HuntTargetPlayer(RandomPlayer):
+    """
+    Игрок "поиск - добивание".
+    Пока раненых кораблей нет, стреляет в случайные клетки. После попадания
+    стреляет в соседние по стороне клетки, а после второго попадания -
+    только вдоль найденной линии. Корабли прямые и не касаются друг друга,
+    поэтому клетки по диагонали от попадания и клетки вокруг потопленного
+    корабля заведомо пусты и исключаются из непроверенных.
+    """
+    def __init__(self, size, ships_list=(), rng=random):
+        RandomPlayer.__init__(self, size, ships_list, rng)
+        # Попадания в еще не потопленный корабль и клетки для добивания.
+        self.hits = []
+        self.targets = []
+
+    def next_shot(self):
+        while self.targets:
+            x, y = self.targets.pop()
+            if self.is_untried(x, y):
+                self.take(x, y)
+                return x, y
+        return RandomPlayer.next_shot(self)
+
+    def observe(self, x, y, hit, sunk_cells=None):
+        if not hit:
+            return
+        if sunk_cells:
+            for cx, cy in sunk_cells:
+                for nx, ny in self.get_around(cx, cy):
+                    self.take(nx, ny)
+            self.hits = []
+            self.targets = []
+            return
+        for dx, dy in ((-1, -1), (1, -1), (-1, 1), (1, 1)):
+            self.take(x + dx, y + dy)
+        self.hits.append((x, y))
+        self.targets = [cell for cell in self.get_targets() if self.is_untried(*cell)]
+
+    def get_targets(self):
+        """
+        Возвращает клетки, в которых может продолжаться раненый корабль.
+        """
+        if len(self.hits) == 1:
+            x, y = self.hits[0]
+            return [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
+        xs = [x for x, y in self.hits]
+        ys = [y for x, y in self.hits]
+        if min(ys) == max(ys):
+            return [(min(xs) - 1, ys[0]), (max(xs) + 1, ys[0])]
+        return [(xs[0], min(ys) - 1), (xs[0], max(ys) + 1)]
+
+def sample_fleets(size, ships_list, blocked, required, count, seed):
+    """
+    Возвращает до count случайных расстановок кораблей ships_list, в которых
+    корабли не заходят в ячейки blocked и занимают все ячейки required.
+    Расстановка - кортеж масок палуб кораблей.
+    Функция верхнего уровня, чтобы ее можно было выполнять в пуле процессов.
+    """
+    rng = random.Random(seed)
+    samples = []
+    for attempt in range(count * MAX_SAMPLE_ATTEMPTS):
+        placement = random_placement(size, ships_list, rng, blocked, required)
+        if placement is not None:
+            samples.append(tuple(get_ship_masks(size, *ship)[0] for ship in placement))
+            if len(samples) == count:
+                break
+    return samples
+
+
+class MonteCarloPlayer(RandomPlayer):
+    """
+    Игрок, оценивающий вероятность корабля в каждой клетке.
+    Набирается sample_count случайных расстановок оставшихся кораблей,
+    согласных со всем увиденным: корабли не стоят на промахах и рядом
+    с потопленными кораблями и покрывают все попадания. Выстрел делается
+    в клетку, занятую кораблем в наибольшем числе расстановок.
+    После выстрела согласные с ним расстановки сохраняются, и добираются
+    только недостающие; с executor (пулом процессов) они генерируются
+    параллельно пачками.
+    """
+    def __init__(self, size, ships_list=(), rng=random, sample_count=SAMPLE_COUNT, executor=None, chunks=4):
+        RandomPlayer.__init__(self, size, ships_list, rng)
+        self.sample_count = sample_count
+        self.executor = executor
+        self.chunks = chunks
+        # Корабли, которые еще не потоплены.
+        self.remaining = list(self.ships_list)
+        # Клетки, где кораблей нет, и попадания в непотопленные корабли.
+        self.blocked = 0
+        self.hits = 0
+        # Расстановки: пары (маска всех палуб, кортеж масок кораблей).
+        self.samples = []
+
+    def observe(self, x, y, hit, sunk_cells=None):
+        bit = 1 << (y * self.size + x)
+        if not hit:
+            self.blocked |= bit
+        elif sunk_cells:
+            ship = 0
+            for cx, cy in sunk_cells:
+                ship |= 1 << (cy * self.size + cx)
+                for nx, ny in self.get_around(cx, cy):
+                    self.take(nx, ny)
+                    self.blocked |= 1 << (ny * self.size + nx)
+            self.hits &= ~ship
+            self.remaining.remove(len(sunk_cells))
+            samples = []
+            for union, ships in self.samples:
+                if ship in ships:
+                    ships = list(ships)
+                    ships.remove(ship)
+                    samples.append((union & ~ship, tuple(ships)))
+            self.samples = samples
+        else:
+            self.hits |= bit
+            # Корабли прямые и не касаются друг друга.
+            for dx, dy in ((-1, -1), (1, -1), (-1, 1), (1, 1)):
+                if 0 <= x + dx < self.size and 0 <= y + dy < self.size:
+                    self.take(x + dx, y + dy)
+                    self.blocked |= 1 << ((y + dy) * self.size + x + dx)
+        self.samples = [
+                (union, ships) for union, ships in self.samples
+                if not union & self.blocked and not self.hits & ~union
+        ]
+
+    def refill(self):
+        """
+        Добирает расстановки до sample_count.
+        """
+        missing = self.sample_count - len(self.samples)
+        if missing <= 0 or not self.remaining:
+            return
+        args = (self.size, self.remaining, self.blocked, self.hits)
+        if self.executor is None:
+            batches = [sample_fleets(*args, missing, self.rng.randrange(2 ** 32))]
+        else:
+            chunk = -(-missing // self.chunks)
+            futures = [
+                    self.executor.submit(sample_fleets, *args, chunk, self.rng.randrange(2 ** 32))
+                    for i in range(self.chunks)
+            ]
+            batches = [future.result() for future in futures]
+        for batch in batches:
+            for ships in batch:
+                union = 0
+                for ship in ships:
+                    union |= ship
+                self.samples.append((union, ships))
+
+    def get_density(self):
+        """
+        Возвращает список: для каждой клетки - число расстановок,
+        в которых она занята кораблем.
+        """
+        density = [0] * (self.size * self.size)
+        for union, ships in self.samples:
+            while union:
+                low = union & -union
+                density[low.bit_length() - 1] += 1
+                union ^= low
+        return density
+
+    def next_shot(self):
+        self.refill()
+        if not self.samples:
+            return RandomPlayer.next_shot(self)
+        density = self.get_density()
+        best = max(density[y * self.size + x] for x, y in self.untried)
+        candidates = [(x, y) for x, y in self.untried if density[y * self.size + x] == best]
+        x, y = self.rng.choice(candidates)
+        self.take(x, y)
+        return x, y
+
+def test(argv=sys.argv):
+    import time
+    import functools
+    from concurrent.futures import ProcessPoolExecutor
+    from model import NavalModel
+
+    with ProcessPoolExecutor() as executor:
+        players = [
+            (RandomPlayer, 100),
+            (HuntTargetPlayer, 100),
+            (MonteCarloPlayer, 5),
+            (functools.partial(MonteCarloPlayer, executor=executor), 5),
+        ]
+        for player_class, games in players:
+            random.seed(1)
+            shots = 0
+            model = NavalModel(player_class=player_class)
+            started = time.perf_counter()
+            for game in range(games):
+                model.new_game(10, 4)
+                while not all(ship.is_sunk() for ship in model.h_board.get_ships()):
+                    shots += model.c_fire()
+            elapsed = time.perf_counter() - started
+            name = getattr(player_class, 'func', player_class).__name__
+            if isinstance(player_class, functools.partial):
+                name += ' (process pool)'
+            print('%s: %.1f shots per game, %.2f ms per shot' % (name, shots / games, elapsed / shots * 1000))
+
+if __name__ == "__main__":
+    sys.exit(test())